@@ -1,462 +1,533 @@
 import streamlit as st
 import google.generativeai as genai
-import gspread
-from google.oauth2.service_account import Credentials
-from PIL import Image
 import io
-import json
+import os
 import time
-import re
-from datetime import datetime
-import difflib
+import uuid
+from concurrent.futures import wait, FIRST_COMPLETED
+from qc_config import MAT_CONFIG
+from qc_refine import refine_batch_number, StreamingJSONParser, PARSE_STATS, parse_failure_rate
+from qc_model import ModelCaller, ModelCallError
+from qc_engine import ExtractionEngine
+from qc_image import encode_preview, detect_orientation, apply_orientation
+from qc_cache import ExtractionCache
+from qc_pipeline import build_request, finish_result, is_complete, decode_image, prepare_image
+from qc_pages import UPLOAD_TYPES, is_paged, count_pages, load_page, iter_pages
+from qc_upload import spool_upload
+from qc_vocab import snap_field
+from qc_sheets import SheetClient
+from qc_queue import SheetJournal, SheetFlusher
+from qc_dupes import KeyIndex, KeySyncer, BLOCKING_KEYS
+from qc_backends import (stub_model_factory, MemorySheetClient, usage_of, LatencyDist, StubContextBackend,
+                         EXTRACT_BACKENDS, SHEET_BACKENDS)
+from qc_context import ContextCache, GeminiContextBackend, context_cached_factory
+from qc_cassette import Cassette, CassetteSheetClient, cassette_model_factory, REPLAY
+from qc_trace import Tracer, DEFAULT_METRICS, current_scan_id
+from qc_usage import UsageLedger
 
 # --- KONFIGURASI AWAL ---
-GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-SHEET_NAME = st.secrets["SHEET_NAME"]
+# Backend ekstraksi: "gemini" atau "stub"; backend sheet: "gspread" atau "memory".
+# stub + memory = seluruh UI & pipeline jalan offline tanpa kredensial (untuk load test / profiling)
+EXTRACT_BACKEND = os.environ.get("QC_EXTRACT_BACKEND", "gemini").strip().lower()
+SHEET_BACKEND = os.environ.get("QC_SHEET_BACKEND", "gspread").strip().lower()
+# Nilai salah ketik jangan diam-diam jatuh ke backend asli (atau NameError di tengah jalan)
+if EXTRACT_BACKEND not in EXTRACT_BACKENDS:
+    raise ValueError(f"QC_EXTRACT_BACKEND={EXTRACT_BACKEND!r} tidak dikenal, pilih salah satu: {', '.join(EXTRACT_BACKENDS)}")
+if SHEET_BACKEND not in SHEET_BACKENDS:
+    raise ValueError(f"QC_SHEET_BACKEND={SHEET_BACKEND!r} tidak dikenal, pilih salah satu: {', '.join(SHEET_BACKENDS)}")
+STUB_LATENCY = {"median": 4.0, "p95": 10.0} # Distribusi latency stub AI (detik)
+# Cassette: QC_CASSETTE=<file.jsonl> membungkus backend di atas. Mode "record" menyimpan request + respons asli,
+# mode "replay" memutar ulang dari file tanpa API (QC_CASSETTE_SPEED=0 -> tanpa delay latency rekaman)
+CASSETTE_PATH = os.environ.get("QC_CASSETTE")
+CASSETTE_MODE = os.environ.get("QC_CASSETTE_MODE", REPLAY)
+CASSETTE_SPEED = float(os.environ.get("QC_CASSETTE_SPEED", "1"))
+REPLAYING = bool(CASSETTE_PATH) and CASSETTE_MODE == REPLAY
 #CREDENTIALS_FILE = 'credentials.json' 
-MONTH_MAP = {'A': '10', 'B': '11', 'C': '12'}
-
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
+ENGINE_MAX_IN_FLIGHT = 16 # Jumlah panggilan AI yang boleh jalan bersamaan (semua session)
+CACHE_MAX_MB = 50 # Batas ukuran cache hasil scan di disk
+ROI_CROP = False # Crop header + tabel pengujian; nyalakan kalau bench_preprocess --settings roi-jpeg lebih hemat byte/token
+PREVIEW_SIDE = 1200 # Sisi terpanjang thumbnail preview
+UPLOAD_SPOOL_MB = 4 # Upload lebih besar dari ini disalin ke file di .qc_cache/uploads, bukan disimpan di memori
+MAX_PENDING_PAGES = 8 # Halaman PDF/TIFF yang sudah diproses tapi menunggu AI; lebih dari ini decode ditahan dulu
+PROMPT_MODE = os.environ.get("QC_PROMPT", "compiled") # "compiled" (qc_prompt) atau "legacy" (prompt di MAT_CONFIG)
+# Durasi per tahap scan: log span JSONL + file metrik (.prom untuk Prometheus textfile collector, atau .csv)
+METRICS_FILE = os.environ.get("QC_METRICS_FILE", DEFAULT_METRICS)
+
+MODEL_NAME = 'gemini-2.5-flash'
+FALLBACK_MODEL = 'gemini-2.5-flash-lite' # Dipakai kalau model utama lambat/overload
+MODEL_TIMEOUT = 30 # Batas waktu satu percobaan panggilan AI (detik)
+MODEL_DEADLINE = 60 # Batas waktu total satu scan termasuk retry (detik)
+MODEL_LATENCY_BUDGET = 20 # Lewat dari ini, percobaan berikutnya pindah ke FALLBACK_MODEL
+# Prompt material didaftarkan sebagai cached content Gemini (QC_CONTEXT_CACHE=1 untuk menyalakan).
+# Default mati: prompt sekarang di bawah minimum 1024 token cached content, jadi cache tidak pernah terpakai
+CONTEXT_CACHE = os.environ.get("QC_CONTEXT_CACHE", "0") == "1"
+CONTEXT_CACHE_TTL = 3600 # Umur cached content (detik), diperpanjang otomatis selama masih dipakai
+KEY_SYNC_INTERVAL = 60 # Jeda sync index duplikat dari sheet (detik), hanya membaca baris baru
+
+if EXTRACT_BACKEND == "gemini" and not REPLAYING:
+    GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
+    genai.configure(api_key=GEMINI_API_KEY)
+if SHEET_BACKEND == "gspread" and not REPLAYING:
+    SHEET_NAME = st.secrets["SHEET_NAME"]
 
 st.set_page_config(page_title="LLDPE Scanner", page_icon="📸")
 
-#============================KONFIGURASI MATERIAL================================================================================
-MAT_CONFIG = {
-    "LLDPE": {
-        "prompt": """
-            Analisa checksheet LLDPE ini dengan sangat teliti. 
-            Fokus utama pada tabel pengujian teknis baris nomor 8, 9, dan 10.
-            
-            ATURAN EKSTRAKSI BARIS HASIL:
-            1. Row 8 (Tensile): Ambil nilai MD (atas) dan TD (bawah).
-            2. Row 9 (Elongation): Ambil nilai MD (atas) dan TD (bawah). Nilai bisa berupa '> 1400'.
-            3. Row 10 (Modulus Young): Ambil nilai MD (atas) dan TD (bawah) bernilai integer/tanpa koma.
-            
-            INSTRUKSI KHUSUS UKURAN:
-            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 75).
-            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-            Gunakan nilai dari baris 'Ukuran' di header saja
-            
-            INSTRUKSI KHUSUS NO BATCH:
-            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-            2. No. Batch hanya ada sebanyak 1 baris
-            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-            5. PENTING: Segmen IDS WAJIB salah satu dari: [SIA, BLF, NEW, PVT].
-            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/HLF/FZF', maka ekstrak sebagai '25C15/SB/25C15/BLF/FZF'.
-
-            INSTRUKSI KHUSUS NAMA FILM:
-            1. NAMA MATERIAL SELALU DIAWALI DENGAN "LLDPE". Jika tidak ada LLDPE, tambahkan "LLDPE" diawal nama
-            2. Setelah "LLDPE" harus selalu diikuti salah satu dari :
-            ["C4","C4 AST","C4 BAG","C4 ESS","C4 FZF","C4 KCK","C4 KMR","C4 PWD",
-            "C4 SNK","C4 STDG","C4 STDG POUCH","C4 STP","C4 WHITE","C4 WHITE STP","C8","C8 BAG",
-            "C8 BNH","C8 BRS","C8 EASY PEEL","C8 FZF","C8 KGK","C8 KKC","C8 KML","C8 KMR",
-            "C8 MBTL","C8 MURNI","C8 PSD","C8 PWD","C8 SP-LC","C8 STDG","C8 STP","C8 VACUUM",
-            "C8 VCM","C8 VKJ","C8+","EP","SCU(16)","SP(17)","SP(17)-WP","SP8N",
-            "SP-B","SP-F","SP-LC","SP-P","SP-WP"]
-
-            INSTRUKSI KHUSUS NO SURAT JALAN:
-            1. NO SURAT JALAN mempunyai 4 format. Pilih salah satu dari :["SJRBFI-XXXXXXXX", "SIA-XXXXXXXXX", "SPXXXXXXXX", "XXX/BJ/(angka romawi)/tahun"].
-
-            EKSTRAK KE JSON (tanpa ```json):
-            {
-            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
-            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
-            "modulus_md": "", "modulus_td": "",
-            "supplier": "Pilih: BLASFOLIE/SAKA/NUSA EKA/PANVERTA", "sampling_size": ""
-            }
-            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-            """, 
-        "display_names": {
-            "tanggal": "Tanggal Checksheet",
-            "no_surat_jalan": "No Surat Jalan",
-            "no_po": "No PO",
-            "no_batch": "Nomor Batch",
-            "jml_datang": "Jumlah Datang",
-            "supplier": "Supplier",
-            "cof": "COF",
-            "initial_seal_temp": "Seal Temperature",
-            "hasil_initial_seal": "Nilai Seal",
-            "tensile_md": "Tensile MD",
-            "tensile_td": "Tensile TD",
-            "elongation_md": "Elongation MD",
-            "elongation_td": "Elongation TD",
-            "modulus_md": "Modulus MD",
-            "modulus_td": "Modulus TD"
-        }
-    },
-
-    "CPP": {
-        "prompt": """
-            Analisa checksheet CPP ini dengan sangat teliti. 
-            Fokus utama pada tabel pengujian teknis baris nomor 7, 8, dan 9.
-            
-            ATURAN EKSTRAKSI BARIS HASIL:
-            1. Row 7 (Tensile): Ambil nilai MD (atas) dan TD (bawah).
-            2. Row 8 (Elongation): Ambil nilai MD (atas) dan TD (bawah). Nilai bisa berupa '> 1400'.
-            3. Row 9 (Modulus Young): Ambil nilai MD (atas) dan TD (bawah) bernilai integer/tanpa koma.
-            
-            INSTRUKSI KHUSUS UKURAN:
-            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 25).
-            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-            Gunakan nilai dari baris 'Ukuran' di header saja
-            
-            INSTRUKSI KHUSUS NO BATCH:
-            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-            2. No. Batch hanya ada sebanyak 1 baris
-            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-            5. PENTING: Segmen IDS WAJIB salah satu dari: [PSAJ, IPM, PVT].
-            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/1PM/FZF', maka ekstrak sebagai '25C15/SB/25C15/IPM/FZF'.
-
-            INSTRUKSI KHUSUS NAMA FILM:
-            1. NAMA MATERIAL SELALU DIAWALI DENGAN "CPP". Jika tidak ada CPP, tambahkan "CPP " diawal nama
-            2. Setelah "CPP" harus selalu diikuti salah satu dari :
-            ['CHS-HD', 'CHS-K', 'CHS-V', 'CHS-V2', 'PJZL-20', 'HHK08', 'HHK-08', 'HHK']
-
-            INSTRUKSI KHUSUS NO SURAT JALAN:
-            1. NO SURAT JALAN mempunyai format salah satu dari : ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"].
-
-            EKSTRAK KE JSON (tanpa ```json):
-            {
-            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
-            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
-            "modulus_md": "", "modulus_td": "",
-            "supplier": "Pilih: INDONESIA PRATAMA/PERDANA SETIA ABADI/PANVERTA", "sampling_size": ""
-            }
-            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-            """, 
-        "display_names": {
-            "tanggal": "Tanggal Checksheet",
-            "no_surat_jalan": "No Surat Jalan",
-            "no_po": "No PO",
-            "no_batch": "Nomor Batch",
-            "jml_datang": "Jumlah Datang",
-            "supplier": "Supplier",
-            "cof": "COF",
-            "initial_seal_temp": "Seal Temperature",
-            "hasil_initial_seal": "Nilai Seal",
-            "tensile_md": "Tensile MD",
-            "tensile_td": "Tensile TD",
-            "elongation_md": "Elongation MD",
-            "elongation_td": "Elongation TD",
-            "modulus_md": "Modulus MD",
-            "modulus_td": "Modulus TD"
-        }
-    },
-
-    "VMCPP": {
-        "prompt": """
-            Analisa checksheet VMCPP ini dengan sangat teliti. 
-            
-            INSTRUKSI KHUSUS UKURAN:
-            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 25).
-            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-            Gunakan nilai dari baris 'Ukuran' di header saja
-            
-            INSTRUKSI KHUSUS NO BATCH:
-            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-            2. No. Batch hanya ada sebanyak 1 baris
-            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-            5. PENTING: Segmen IDS WAJIB salah satu dari: [PSAJ, IPM, PVT].
-            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/1PM/FZF', maka ekstrak sebagai '25C15/SB/25C15/IPM/FZF'.
-
-            INSTRUKSI KHUSUS NAMA FILM:
-            1. NAMA MATERIAL SELALU DIAWALI DENGAN "VMCPP". Jika tidak ada VMCPP, tambahkan "VMCPP " diawal nama
-            2. Setelah "CPP" harus selalu diikuti salah satu dari :
-            ['CMS-W3', 'CMS-VUB', 'MGAA', 'MGAB', 'KHMMHB', 'KKHMMHBST']
-
-            INSTRUKSI KHUSUS NO SURAT JALAN:
-            1. NO SURAT JALAN mempunyai format salah satu dari : ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"].
-
-            EKSTRAK KE JSON (tanpa ```json):
-            {
-            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
-            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
-            "modulus_md": "", "modulus_td": "",
-            "supplier": "Pilih: INDONESIA PRATAMA/PERDANA SETIA ABADI/PANVERTA", "sampling_size": ""
-            }
-            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-            """, 
-        "display_names": {
-            "tanggal": "Tanggal Checksheet",
-            "no_surat_jalan": "No Surat Jalan",
-            "no_po": "No PO",
-            "no_batch": "Nomor Batch",
-            "jml_datang": "Jumlah Datang",
-            "supplier": "Supplier",
-            "cof": "COF",
-            "initial_seal_temp": "Seal Temperature",
-            "hasil_initial_seal": "Nilai Seal",
-            "bonding_metalize": "Bonding Metalize",
-        }
-    },
-
-
-
-    "PET": {
-        "prompt": """
-            Analisa checksheet PET ini dengan sangat teliti. 
-            
-            INSTRUKSI KHUSUS UKURAN:
-            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [9, 11, 12]).
-            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-            Gunakan nilai dari baris 'Ukuran' di header saja
-            
-            INSTRUKSI KHUSUS NO BATCH:
-            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-            2. No. Batch hanya ada sebanyak 1 baris
-            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-            5. PENTING: Segmen IDS WAJIB salah satu dari: [AKPI, IDP, CFI, TRST, IMS].
-            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
-
-            INSTRUKSI KHUSUS NAMA FILM:
-            1. NAMA MATERIAL SELALU DIAWALI DENGAN "PET". Jika tidak ada PET, tambahkan "PET " diawal nama
-            2. Setelah "PET" harus selalu diikuti salah satu dari :
-            ["IF", "EP", "TF", "PL"]  dan diikuti oleh thickness. Contoh "PET IF-9" atau "PET EP-12"
-
-            INSTRUKSI KHUSUS NO SURAT JALAN:
-            1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)","FXXXXXXXX", "XXXXXXXX"].
-
-
-            EKSTRAK KE JSON (tanpa ```json):
-            {
-            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-            "cof": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS/ARGHA KARYA/COLORPAK/INTI MAKMUR SEJATI", "sampling_size": ""
-            }
-            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-            """, 
-        "display_names": {
-            "tanggal": "Tanggal Checksheet",
-            "no_surat_jalan": "No Surat Jalan",
-            "no_po": "No PO",
-            "no_batch": "Nomor Batch",
-            "jml_datang": "Jumlah Datang",
-            "supplier": "Supplier",
-            "cof": "COF",
-        }
-    },
-
-        "VMPET": {
-            "prompt": """
-                Analisa checksheet VMPET ini dengan sangat teliti. 
-                
-                INSTRUKSI KHUSUS UKURAN:
-                1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-                2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-                3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [9, 12]).
-                4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-                Gunakan nilai dari baris 'Ukuran' di header saja
-                
-                INSTRUKSI KHUSUS NO BATCH:
-                1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-                2. No. Batch hanya ada sebanyak 1 baris
-                3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-                4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-                5. PENTING: Segmen IDS WAJIB salah satu dari: [IDP,TRST].
-                6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-                7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
-
-                INSTRUKSI KHUSUS NAMA FILM:
-                1. NAMA MATERIAL SELALU DIAWALI DENGAN "VMPET". Jika tidak ada VMPET, tambahkan "VMPET " diawal nama
-                2. Setelah "VMPET" harus selalu diikuti salah satu dari :
-                ["IMM", "IMN", "IMS","KZMB"] dan diikuti oleh thickness. Contoh "VMPET IMN-12"
-
-                INSTRUKSI KHUSUS NO SURAT JALAN:
-                1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "XXXXXXXX"].
-
-
-                EKSTRAK KE JSON (tanpa ```json):
-                {
-                "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-                "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-                "bonding_metalize": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS", "sampling_size": ""
-                }
-                Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-                """, 
-            "display_names": {
-                "tanggal": "Tanggal Checksheet",
-                "no_surat_jalan": "No Surat Jalan",
-                "no_po": "No PO",
-                "no_batch": "Nomor Batch",
-                "jml_datang": "Jumlah Datang",
-                "supplier": "Supplier",
-                "bonding_metalize": "Bonding Metalize",
-            }
-        },
-
-        "OPP": {
-            "prompt": """
-                Analisa checksheet OPP ini dengan sangat teliti. 
-                
-                INSTRUKSI KHUSUS UKURAN:
-                1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
-                2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
-                3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [18, 20, 21]).
-                4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
-                Gunakan nilai dari baris 'Ukuran' di header saja
-                
-                INSTRUKSI KHUSUS NO BATCH:
-                1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
-                2. No. Batch hanya ada sebanyak 1 baris
-                3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
-                4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
-                5. PENTING: Segmen IDS WAJIB salah satu dari: [AKPI, IDP, CFI, TRST, IMS].
-                6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
-                7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
-
-                INSTRUKSI KHUSUS NAMA FILM:
-                1. NAMA MATERIAL SELALU DIAWALI DENGAN "OPP". Jika tidak ada OPP, tambahkan "OPP " diawal nama
-                2. Setelah "OPP" harus selalu diikuti salah satu dari :
-                ["SF", "MF", "SW", "STT", "PF", "PLE", "PCI"] dan diikuti oleh thickness. Contoh "OPP SF-18" atau "OPP STT-20"
-
-                INSTRUKSI KHUSUS NO SURAT JALAN:
-                1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)","FXXXXXXXX", "XXXXXXXX"].
-
-
-                EKSTRAK KE JSON (tanpa ```json):
-                {
-                "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
-                "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
-                "cof": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS/ARGHA KARYA/COLORPAK/INTI MAKMUR SEJATI", "sampling_size": ""
-                }
-                Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
-                """, 
-            "display_names": {
-                "tanggal": "Tanggal Checksheet",
-                "no_surat_jalan": "No Surat Jalan",
-                "no_po": "No PO",
-                "no_batch": "Nomor Batch",
-                "jml_datang": "Jumlah Datang",
-                "supplier": "Supplier",
-                "cof": "COF",
-            }
-        }
-}
-
-#===================================================================================================================
-
-
-# --- 2. FUNGSI AUTOCORRECT & REGEX BATCH ---
-def refine_batch_number(raw_batch):
-    if not raw_batch or len(str(raw_batch)) < 5:
-        return str(raw_batch), ""
-    
-    # 1. Normalisasi teks
-    text = str(raw_batch).upper().strip()
-    
-    # Fungsi Koreksi Karakter OCR
-    def fix_date_chars(s):
-        return s.replace('O', '0').replace('I', '1').replace('L', '1').replace('S', '5').replace('J', '1')
+# Satu instance cache untuk semua session (bertahan antar rerun)
+@st.cache_resource
+def get_extract_cache():
+    return ExtractionCache(max_bytes=CACHE_MAX_MB * 1024 * 1024)
 
-    # 2. Ambil 5 karakter pertama (YYMDD)
-    p1_raw = fix_date_chars(text[:5])
-    
-    tgl_kedatangan = ""
-    try:
-        # Ekstraksi YY, M, DD
-        yy = "20" + p1_raw[0:2]
-        m_char = p1_raw[2]
-        dd = p1_raw[3:5]
-        
-        # Logika Mapping Bulan
-        mm = None
-        if m_char in MONTH_MAP:
-            mm = MONTH_MAP[m_char] # Mengambil A, B, atau C
-        elif m_char.isdigit():
-            mm = m_char.zfill(2)   # Mengambil 1-9 menjadi 01-09
-            
-        if mm and int(mm) <= 12:
-            # Bentuk format DD-MM-YYYY
-            date_str = f"{dd}-{mm}-{yy}"
-            # Validasi kebenaran tanggal (mencegah tanggal 32, dsb)
-            datetime.strptime(date_str, "%d-%m-%Y")
-            tgl_kedatangan = date_str
-    except Exception:
-        tgl_kedatangan = "Tidak Terdeteksi" # Jika gagal, biarkan kosong agar bisa diisi manual
-
-    # 3. Merapikan format nomor batch (Regex)
-    parts = re.split(r'[^A-Z0-9]', text)
-    parts = [p for p in parts if p]
-    
-    if len(parts) >= 4:
-        def fix_text_chars(s):
-            return s.replace('0', 'O').replace('1', 'I').replace('5', 'S').replace('8', 'B')
-        
-        # Susun ulang dengan pemisah '/' yang standar
-        p1 = p1_raw
-        p2 = fix_text_chars(parts[1])
-        p3 = fix_date_chars(parts[2])
-        p4 = fix_text_chars(parts[3])
-        extra = parts[4:]
-        cleaned_batch = "/".join([p1, p2, p3, p4] + extra)
+extract_cache = get_extract_cache()
+
+@st.cache_resource
+def get_cassette():
+    return Cassette(CASSETTE_PATH, CASSETTE_MODE, speed=CASSETTE_SPEED) if CASSETTE_PATH else None
+
+cassette = get_cassette()
+
+@st.cache_resource
+def get_tracer():
+    return Tracer(metrics_path=METRICS_FILE)
+
+tracer = get_tracer()
+
+# Catatan token & biaya per scan (laporan: python qc_usage.py --by material day operator)
+@st.cache_resource
+def get_usage_ledger():
+    return UsageLedger()
+
+usage_ledger = get_usage_ledger()
+
+# Client Google Sheets dipakai bersama semua session, tidak authorize ulang tiap kirim
+@st.cache_resource
+def get_sheet_client():
+    if SHEET_BACKEND == "memory":
+        client = MemorySheetClient()
+    elif REPLAYING:
+        client = None
     else:
-        cleaned_batch = text
+        client = SheetClient(st.secrets["gcp_service_account"], SHEET_NAME, sheet_key=st.secrets.get("SHEET_KEY"))
+    return CassetteSheetClient(client, cassette) if cassette else client
+
+sheet_client = get_sheet_client()
 
-    return cleaned_batch, tgl_kedatangan
+# Journal lokal + thread flusher: baris dikonfirmasi -> SQLite dulu, dikirim ke sheet per batch di background
+@st.cache_resource
+def get_sheet_flusher():
+    # Sheet memori tidak persisten, jadi journal-nya juga di memori (tidak bercampur dengan antrian asli)
+    journal = SheetJournal(":memory:") if SHEET_BACKEND == "memory" or REPLAYING else SheetJournal()
+    return SheetFlusher(journal, sheet_client, tracer=tracer).start()
+
+sheet_flusher = get_sheet_flusher()
+
+# Index key (no_batch, surat jalan + PO) untuk peringatan scan dobel tanpa download sheet
+@st.cache_resource
+def get_key_index():
+    index = KeyIndex(":memory:") if SHEET_BACKEND == "memory" or REPLAYING else KeyIndex()
+    # Saat replay cassette tidak ada sheet yang bisa dibaca: index hanya berisi kiriman session ini
+    syncer = None if REPLAYING else KeySyncer(index, sheet_client, interval=KEY_SYNC_INTERVAL).start()
+    return index, syncer
+
+key_index, key_syncer = get_key_index()
+
+@st.cache_resource
+def get_context_cache():
+    if not CONTEXT_CACHE:
+        return None
+    backend = StubContextBackend(LatencyDist(**STUB_LATENCY)) if EXTRACT_BACKEND == "stub" else GeminiContextBackend()
+    return ContextCache(backend, ttl=CONTEXT_CACHE_TTL)
+
+context_cache = get_context_cache()
+
+@st.cache_resource
+def get_model_caller():
+    model_factory = stub_model_factory(**STUB_LATENCY) if EXTRACT_BACKEND == "stub" else None
+    if context_cache:
+        model_factory = context_cached_factory(context_cache, model_factory or genai.GenerativeModel)
+    if cassette:
+        model_factory = cassette_model_factory(cassette, model_factory or genai.GenerativeModel)
+    return ModelCaller(MODEL_NAME, FALLBACK_MODEL, attempt_timeout=MODEL_TIMEOUT,
+                       deadline=MODEL_DEADLINE, latency_budget=MODEL_LATENCY_BUDGET,
+                       model_factory=model_factory)
+
+model_caller = get_model_caller()
+
+# Satu event loop asyncio untuk semua session: banyak ekstraksi jalan tanpa satu thread per request
+@st.cache_resource
+def get_engine():
+    return ExtractionEngine(model_caller, max_in_flight=ENGINE_MAX_IN_FLIGHT)
+
+engine = get_engine()
 
 # --- FUNGSI AI (AKURASI TINGGI) ---
-def extract_data_qc(image_file, material_type):
-    img = image_file
-    img.thumbnail((1600, 1600)) 
-    
-    prompt = MAT_CONFIG[material_type]["prompt"]
-    
-    response = model.generate_content([prompt, img])
+def _prepare_request(image_file, material_type):
+    return build_request(image_file, material_type, roi=ROI_CROP, tracer=tracer, prompt_mode=PROMPT_MODE)
+
+def _record_usage(material_type, model, response):
+    usage = usage_of(response)
+    cost = usage_ledger.record(material_type, model, usage, scan_id=current_scan_id(),
+                               operator=st.session_state.get('operator'))
+    st.session_state['last_usage'] = (usage, cost) if usage else None
+
+def _finish_extraction(text, material_type, cache_key):
+    data = finish_result(text, material_type, tracer=tracer)
+    if is_complete(data):
+        extract_cache.put(cache_key, data)
+    return data
+
+def _run_extraction(image_file, material_type):
+    parts, generation_config, cache_key = _prepare_request(image_file, material_type)
+
+    # Cek cache dulu: foto + material + versi prompt yang sama tidak perlu panggil AI lagi
+    cached = extract_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    with tracer.span("model"):
+        response, attempts = engine.submit(parts, generation_config).result()
+    _record_usage(material_type, attempts[-1]["model"], response)
+    return _finish_extraction(response.text, material_type, cache_key)
+
+# Versi streaming: on_field(key, value) dipanggil begitu satu field selesai ter-decode
+def _run_extraction_stream(image_file, material_type, on_field):
+    parts, generation_config, cache_key = _prepare_request(image_file, material_type)
+
+    cached = extract_cache.get(cache_key)
+    if cached is not None:
+        for key, value in cached.items():
+            on_field(key, value)
+        return cached
+
+    parser = StreamingJSONParser()
+    meta = {}
+    # Ambil slot engine dulu: scan streaming juga dihitung dalam batas ENGINE_MAX_IN_FLIGHT
+    with tracer.span("model", stream=True), engine.slot():
+        for chunk in model_caller.stream(parts, generation_config=generation_config, meta=meta):
+            for key, value in parser.feed(chunk).items():
+                if key == 'no_batch':
+                    value, tgl_kedatangan = refine_batch_number(value)
+                    on_field('tanggal_kedatangan_batch', tgl_kedatangan)
+                value, _ = snap_field(material_type, key, value)
+                on_field(key, value)
+    _record_usage(material_type, meta.get("model"), meta.get("response"))
+    return _finish_extraction(parser.buffer, material_type, cache_key)
+
+def extract_data_qc(image_file, material_type, on_field=None):
     try:
-        clean_json = response.text.strip().replace('```json', '').replace('```', '')
-        data = json.loads(clean_json)
-        
-        # JALANKAN REFINERY DI SINI
-        batch_raw = data.get('no_batch', '')
-        cleaned_b, tgl_kedatangan = refine_batch_number(batch_raw)
-        
-        # Masukkan kembali ke dictionary hasil scan
-        data['no_batch'] = cleaned_b
-        data['tanggal_kedatangan_batch'] = tgl_kedatangan
-        return data
+        if on_field:
+            return _run_extraction_stream(image_file, material_type, on_field)
+        return _run_extraction(image_file, material_type)
+    except ModelCallError as e:
+        st.error(f"Gagal memanggil AI: {e}")
+        return None
     except Exception as e:
         st.error(f"Error Parsing: {e}")
         return None
 
+# --- FUNGSI BATCH SCAN (PARALEL) ---
+# Preprocessing jalan di thread script, panggilan AI semua dikirim ke engine asyncio sekaligus;
+# foto berikutnya sudah diproses sementara foto sebelumnya menunggu respons AI.
+# PDF/TIFF diproses per halaman: hasil yang sudah selesai langsung dilaporkan di sela decode halaman berikutnya,
+# dan decode ditahan kalau sudah MAX_PENDING_PAGES halaman menunggu AI (memori tetap terbatas).
+def _batch_result(name, material_type, res, error, start, scan_id, file_index=None):
+    return {"name": name, "mat": material_type, "res": res, "error": error, "dur": time.time() - start,
+            "scan_id": scan_id, "file": file_index}
+
+def _file_pages(upload):
+    # (nama, gambar) per halaman, halaman berikutnya baru di-render saat diminta
+    with upload.open() as src:
+        if not is_paged(upload.name):
+            yield upload.name, decode_image(src)
+            return
+        for page, img in iter_pages(src, upload.name):
+            yield f"{upload.name} hal. {page + 1}", img
+
+def extract_batch_qc(files, material_type, on_done=None):
+    results = []
+    pending = {}
+
+    def done(result):
+        results.append(result)
+        if on_done:
+            on_done(len(results) - 1, result)
+
+    def collect(block):
+        finished, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for fut in finished:
+            name, file_index, cache_key, start, scan_id, submitted = pending.pop(fut)
+            with tracer.scan(scan_id):
+                try:
+                    try:
+                        response, attempts = fut.result()
+                    finally:
+                        # Durasi dari submit sampai respons diterima (termasuk antri di engine)
+                        tracer.record("model", time.perf_counter() - submitted, batch=True)
+                    _record_usage(material_type, attempts[-1]["model"], response)
+                    res = _finish_extraction(response.text, material_type, cache_key)
+                    done(_batch_result(name, material_type, res, None, start, scan_id, file_index))
+                except Exception as e:
+                    done(_batch_result(name, material_type, None, str(e), start, scan_id, file_index))
+
+    for file_index, f in enumerate(files):
+        pages = _file_pages(f)
+        while True:
+            start = time.time()
+            with tracer.scan() as scan_id, tracer.memory() as mem:
+                try:
+                    t0 = time.perf_counter()
+                    page = next(pages, None)
+                    if page is None:
+                        mem['discard'] = True
+                        break
+                    tracer.record("decode", time.perf_counter() - t0)
+                    name, img = page
+                    img = prepare_image(img, tracer=tracer)
+                    parts, generation_config, cache_key = _prepare_request(img, material_type)
+                    del img
+                    cached = extract_cache.get(cache_key)
+                    if cached is not None:
+                        done(_batch_result(name, material_type, cached, None, start, scan_id, file_index))
+                    else:
+                        fut = engine.submit(parts, generation_config)
+                        pending[fut] = (name, file_index, cache_key, start, scan_id, time.perf_counter())
+                except Exception as e:
+                    # File rusak / halaman gagal di-render: sisa halaman file ini dilewati
+                    done(_batch_result(f.name, material_type, None, str(e), start, scan_id, file_index))
+                    break
+            if pending:
+                collect(block=len(pending) >= MAX_PENDING_PAGES)
+
+    while pending:
+        collect(block=True)
+    return results
+
 # --- FUNGSI SIMPAN  ---
-def save_to_sheets(data_row):
+# Baris ditulis ke journal lokal (langsung aman walau Sheets lambat/down), flusher yang kirim ke sheet
+def save_to_sheets(data_row, scan_id=None):
     try:
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scopes)
-        client = gspread.authorize(creds)
-        sheet = client.open(SHEET_NAME).sheet1
-
-        all_values = sheet.get_all_values()
-        next_row = len(all_values) + 1
-        sheet.update(range_name=f"A{next_row}", values=[data_row], value_input_option='USER_ENTERED')
-        return True
+        job_id = sheet_flusher.journal.enqueue(data_row, scan_id=scan_id)
+        sheet_flusher.wake()
+        return job_id
     except Exception as e:
-        st.error(f"Gagal akses Google Sheets: {e}")
+        st.error(f"Gagal menyimpan ke antrian lokal: {e}")
         return False
 
+def render_queue_status():
+    counts = sheet_flusher.journal.counts()
+    st.sidebar.subheader("📤 Antrian Google Sheets")
+    c_pending, c_flushed = st.sidebar.columns(2)
+    c_pending.metric("Menunggu", counts['pending'])
+    c_flushed.metric("Terkirim", counts['flushed'])
+    lat = sheet_client.latency_stats()
+    if lat:
+        st.sidebar.caption(f"Waktu kirim batch: {lat['last']*1000:.0f} ms (median {lat['p50']*1000:.0f} ms dari {lat['count']} kiriman)")
+    if sheet_flusher.last_error:
+        st.sidebar.warning(f"Gagal kirim, akan dicoba lagi otomatis: {sheet_flusher.last_error}")
+    k = key_index.stats()
+    st.sidebar.caption(f"Index duplikat: {k['keys']} key, sampai baris {k['synced_row']} sheet, {k['pending']} key di antrian")
+    if key_index.last_error:
+        st.sidebar.caption(f"Sync index duplikat gagal: {key_index.last_error}")
+
+def describe_duplicates(dupes):
+    msgs = []
+    for dup in dupes:
+        where = []
+        if dup['count']:
+            where.append(f"{dup['count']}x di sheet (pertama baris {dup['first_row']})")
+        if dup['pending']:
+            where.append("antrian " + ", ".join(f"#{j}" for j in dup['pending']))
+        label = "No. Batch" if dup['kind'] == "no_batch" else "Surat jalan + PO"
+        msgs.append(f"{label} sudah tercatat: {'; '.join(where)}")
+    return msgs
+
+def render_model_status():
+    stats = model_caller.latency_stats()
+    st.sidebar.subheader("🤖 Latency AI")
+    st.sidebar.caption(f"Sedang berjalan: {engine.in_flight}/{engine.max_in_flight} ekstraksi")
+    for name, m in stats.items():
+        st.sidebar.caption(
+            f"{name}: p50 {m['p50']:.1f}s, p95 {m['p95']:.1f}s, max {m['max']:.1f}s "
+            f"({m['count']} percobaan, {m['failed']} gagal)"
+        )
+    if context_cache:
+        c = context_cache.stats()
+        st.sidebar.caption(
+            f"Context cache: {c['active']} aktif, {c['hits']} pakai cache, {c['inline']} inline, "
+            f"{c['created']} dibuat, {c['refreshed']} diperpanjang, {c['errors']} gagal"
+        )
+
+def render_stage_status():
+    stats = tracer.stats()
+    if not stats:
+        return
+    st.sidebar.subheader("⏱️ Durasi per Tahap")
+    for name, m in sorted(stats.items(), key=lambda kv: -kv[1]["avg"]):
+        st.sidebar.caption(f"{name}: p50 {m['p50']*1000:.0f} ms, p95 {m['p95']*1000:.0f} ms ({m['count']}x)")
+    mem = tracer.memory_stats()
+    if mem:
+        mb = 1024 * 1024
+        st.sidebar.caption(
+            f"Peak RSS per scan: p50 {mem['p50']/mb:.0f} MB, p95 {mem['p95']/mb:.0f} MB, max {mem['max']/mb:.0f} MB "
+            f"(naik p95 {mem['delta_p95']/mb:.0f} MB selama scan, {mem['count']} scan)"
+        )
+
+def render_usage_status():
+    rows = usage_ledger.report(("material",), days=1)
+    if not rows:
+        return
+    st.sidebar.subheader("💰 Token AI (24 jam)")
+    for r in rows:
+        st.sidebar.caption(
+            f"{r['material']}: {r['scans']} scan, {r['total'] // r['scans']} token/scan "
+            f"({r['image'] // r['scans']} gambar), ${r['cost']:.4f}"
+        )
+
+def render_parse_status():
+    st.sidebar.subheader("🧾 Parsing Output AI")
+    st.sidebar.caption(
+        f"{PARSE_STATS['ok']} valid, {PARSE_STATS['recovered']} dipulihkan, {PARSE_STATS['failed']} gagal "
+        f"(gagal {parse_failure_rate()*100:.1f}%)"
+    )
+
+# --- LOGIKA MAPPING KOLOM ---
+def build_sheet_row(mat_type, u, d, f_mat, f_tgl_batch):
+    row = None
+    if mat_type == "LLDPE" or mat_type == "CPP":
+        row = [
+                f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
+                u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
+                u.get('cof'), u.get('initial_seal_temp'),u.get('hasil_initial_seal'), u.get('tensile_md'), 
+                u.get('tensile_td'), u.get('elongation_md'), u.get('elongation_td'), 
+                u.get('modulus_md'), u.get('modulus_td'), "", "", "", u.get('supplier'), 
+                d.get('sampling_size')
+        ]
+    
+    elif mat_type == "PET" or mat_type == "OPP":
+        row = [
+                f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
+                u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
+                u.get('cof'),"","","","","","","","","","","",u.get('supplier'), 
+                d.get('sampling_size')
+            ]
+
+    elif mat_type == "VMPET":
+        row = [
+                f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
+                u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
+                "","","","","","","","","","",u.get('bonding_metalize'),"",u.get('supplier'), 
+                d.get('sampling_size')
+            ]
+    
+    elif mat_type == "VMCPP":
+        row = [
+                f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
+                u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
+                u.get('cof'), u.get('initial_seal_temp'),u.get('hasil_initial_seal'),"","","","","","","", 
+                u.get('bonding_metalize'),"",u.get('supplier'),d.get('sampling_size')
+            ]
+    return row
+
+# --- FORM VERIFIKASI ---
+def reset_verify_form(form_key="verify_form"):
+    # Status konfirmasi duplikat milik satu hasil scan: dihapus setelah terkirim atau saat hasil baru masuk
+    st.session_state.pop(f"{form_key}_dup_blocked", None)
+    st.session_state.pop(f"{form_key}_allow_dup", None)
+
+# Return True jika data sudah berhasil dikirim ke sheet
+def render_verify_form(d, mat_type, form_key="verify_form", scan_id=None):
+    with st.form(form_key):
+        st.subheader(f"Data Hasil Scan {mat_type}")
+        if d.get('_parse') == "partial" or d.get('_missing'):
+            missing = ", ".join(d.get('_missing') or []) or "-"
+            st.warning(f"⚠️ Output AI terpotong, hasil tidak lengkap (field hilang: {missing}). "
+                       "Hasil ini tidak disimpan di cache; scan ulang untuk mencoba lagi.")
+        if d.get('_snapped'):
+            fixes = ", ".join(f"{k}: {orig} → {d.get(k)}" for k, (orig, _) in d['_snapped'].items())
+            st.caption(f"🔤 Dikoreksi otomatis ke daftar valid: {fixes}")
+        # Cek duplikat dari index lokal (tanpa baca sheet); no_batch dobel harus dikonfirmasi dulu
+        dupes = key_index.lookup(d)
+        for msg in describe_duplicates(dupes):
+            st.warning(f"⚠️ {msg}")
+        blocked_key = f"{form_key}_dup_blocked"
+        allow_dup = False
+        if any(dup['kind'] in BLOCKING_KEYS for dup in dupes) or st.session_state.get(blocked_key):
+            allow_dup = st.checkbox("Tetap kirim walau No. Batch sudah ada", key=f"{form_key}_allow_dup")
+        f_mat = st.text_input("ukuran", f"{d.get('nama_film')} {d.get('lebar')}mm x {d.get('thickness')}µm")
+        f_tgl_batch = st.text_input("Tanggal Kedatangan (Batch)", d.get('tanggal_kedatangan_batch', ""))
+        # Render input field secara dinamis dari config
+        u = {} # Dictionary untuk menampung input user
+        cols = st.columns(2)
+        display_map = MAT_CONFIG[mat_type]["display_names"]
+        
+        for i, (key, label) in enumerate(display_map.items()):
+            with cols[i % 2]:
+                u[key] = st.text_input(label, d.get(key, ""))
+        
+        if st.form_submit_button("✅ Konfirmasi & Kirim"):
+            # Nilai bisa sudah diedit operator: cek ulang sebelum ditulis
+            blocking = [dup for dup in key_index.lookup(u) if dup['kind'] in BLOCKING_KEYS]
+            if blocking and not allow_dup:
+                st.session_state[blocked_key] = True
+                st.error("No. Batch ini sudah pernah dikirim. Centang konfirmasi di atas kalau memang bukan scan dobel.")
+                return False
+            with tracer.scan(scan_id):
+                with tracer.span("row_map"):
+                    row = build_sheet_row(mat_type, u, d, f_mat, f_tgl_batch)
+                with tracer.span("sheet_enqueue"):
+                    job_id = save_to_sheets(row, scan_id)
+            if job_id:
+                key_index.add(u, job_id)
+                reset_verify_form(form_key)
+                st.session_state['sudah_kirim'] = True
+                st.balloons()
+                st.success(f"Terkirim ke Sono cukk (antrian #{job_id})")
+                return True
+    return False
+
+# --- FILE UPLOAD ---
+# Spool + hash sekali per file upload (file_id unik per upload), bukan tiap rerun.
+# Hanya file yang masih ada di uploader yang disimpan di session.
+def get_uploads(files):
+    cache = st.session_state.get('uploads', {})
+    current = {}
+    for f in files:
+        upload = cache.get(f.file_id)
+        if upload is None or (upload.spooled and not os.path.exists(upload.path)):
+            upload = spool_upload(f, threshold=UPLOAD_SPOOL_MB * 1024 * 1024)
+        current[f.file_id] = upload
+    st.session_state['uploads'] = current
+    return [current[f.file_id] for f in files]
+
+# --- ORIENTASI & PREVIEW GAMBAR ---
+# Orientasi dideteksi sekali per halaman dari gambar yang sama dengan yang dikirim ke AI
+# (decode_image, sama dengan Mode Batch dan bench_golden), lalu dipakai juga untuk preview. Browser hanya menerima thumbnail JPEG
+# yang di-cache per (hash file, sudut putar); gambar untuk AI baru di-decode saat analisa.
+# PDF/TIFF: halaman yang dipilih saja yang di-render, di resolusi preview atau resolusi ekstraksi.
+@st.cache_data(max_entries=16)
+def get_orientation(file_hash, page, _upload):
+    with _upload.open() as src:
+        return detect_orientation(decode_image(src, _upload.name, page))
+
+@st.cache_data(max_entries=32)
+def get_preview(file_hash, page, angle, _upload):
+    quarter, skew = get_orientation(file_hash, page, _upload)
+    with _upload.open() as src:
+        img = apply_orientation(load_page(src, _upload.name, page, PREVIEW_SIDE), quarter, skew)
+    if angle:
+        img = img.rotate(angle, expand=True)
+    return encode_preview(img)
+
+@st.cache_data(max_entries=16)
+def get_page_count(file_hash, _upload):
+    with _upload.open() as src:
+        return count_pages(src, _upload.name)
+
+def get_full_image(upload, page, angle):
+    quarter, skew = get_orientation(upload.hash, page, upload)
+    with tracer.span("decode"), upload.open() as src:
+        img = decode_image(src, upload.name, page)
+    return prepare_image(img, (quarter, skew), angle, tracer=tracer)
+
 def rotate_image():
     st.session_state['rotation_angle'] = (st.session_state['rotation_angle'] - 90) % 360
 
@@ -465,96 +536,162 @@ if 'rotation_angle' not in st.session_state:
 
 # --- UI APP ---
 st.title("📸 Incoming QC Scanner")
+if REPLAYING:
+    st.warning(f"Mode replay cassette: respons AI & sheet diputar ulang dari {CASSETTE_PATH}.")
+elif EXTRACT_BACKEND != "gemini" or SHEET_BACKEND != "gspread":
+    st.warning(f"Mode offline: AI = {EXTRACT_BACKEND}, sheet = {SHEET_BACKEND}. Data tidak dikirim ke Google Sheets asli.")
+elif cassette:
+    st.info(f"Merekam panggilan AI & sheet ke {CASSETTE_PATH}.")
 st.write("Bersama Sunari Membangun Kiyusi")
+render_queue_status()
+render_parse_status()
+render_model_status()
+render_stage_status()
+render_usage_status()
+st.sidebar.text_input("👷 Operator", key='operator')
 material_type = st.radio("Pilih Tipe Material:", ["LLDPE", "PET", "VMPET","OPP","CPP","VMCPP"], horizontal=True)
 
 # Inisialisasi Kunci Anti-Double Send
 if 'sudah_kirim' not in st.session_state:
     st.session_state['sudah_kirim'] = False
 
-uploaded_file = st.file_uploader("Pilih Foto Checksheet", type=["jpg","jpeg","png"])
-
-if uploaded_file:
-    img = Image.open(uploaded_file)
-
-    img_rotated = img.rotate(st.session_state['rotation_angle'], expand=True)
+# Antrian form verifikasi hasil batch scan
+if 'batch_queue' not in st.session_state:
+    st.session_state['batch_queue'] = []
+
+batch_mode = st.toggle("📚 Mode Batch (banyak foto sekaligus)")
+
+if batch_mode:
+    uploaded_files = st.file_uploader("Pilih Foto / PDF / TIFF Checksheet", type=UPLOAD_TYPES, accept_multiple_files=True)
+
+    if uploaded_files and st.button(f"🚀 Mulai Analisa {len(uploaded_files)} File"):
+        start_batch = time.time()
+        uploads = get_uploads(uploaded_files)
+        # Jumlah halaman dibaca dari header PDF/TIFF saja, halaman baru di-render saat diproses
+        page_counts = []
+        for upload in uploads:
+            try:
+                page_counts.append(get_page_count(upload.hash, upload))
+            except Exception:
+                page_counts.append(1)
+        total_pages = sum(page_counts)
+        progress = st.progress(0.0, text=f"0/{total_pages} halaman selesai")
+        status_rows = [st.empty() for _ in uploaded_files]
+        for f, n, slot in zip(uploaded_files, page_counts, status_rows):
+            slot.write(f"⏳ {f.name}" + (f" ({n} halaman)" if n > 1 else ""))
+        file_done = [[] for _ in uploaded_files]
+
+        def on_done(i, r):
+            file_done[r["file"]].append(r)
+            n_done = sum(len(x) for x in file_done)
+            progress.progress(min(1.0, n_done / total_pages), text=f"{n_done}/{total_pages} halaman selesai")
+            lines = []
+            for x in file_done[r["file"]]:
+                if x["error"]:
+                    lines.append(f"❌ {x['name']} — {x['error']}")
+                else:
+                    lines.append(f"✅ {x['name']} ({x['dur']:.2f} detik)")
+            status_rows[r["file"]].write("  \n".join(lines))
+
+        results = extract_batch_qc(uploads, material_type, on_done=on_done)
+        for r in results:
+            if r["res"]:
+                r["key"] = uuid.uuid4().hex
+                st.session_state['batch_queue'].append(r)
+        st.metric("⏱️ Kecepatan Batch", f"{time.time() - start_batch:.2f} detik",
+                  f"{sum(r['dur'] for r in results):.2f} detik jika satu per satu", delta_color="off")
+
+    # Tampilkan antrian form verifikasi
+    queue = st.session_state['batch_queue']
+    if queue:
+        st.subheader(f"Antrian Verifikasi ({len(queue)})")
+    for item in list(queue):
+        with st.expander(f"{item['name']} — {item['mat']} ({item['dur']:.2f} detik)", expanded=item is queue[0]):
+            if render_verify_form(item['res'], item['mat'], form_key=f"verify_form_{item['key']}",
+                                  scan_id=item['scan_id']):
+                queue.remove(item)
+
+else:
+    uploaded_file = st.file_uploader("Pilih Foto / PDF / TIFF Checksheet", type=UPLOAD_TYPES)
+
+    if uploaded_file:
+        upload = get_uploads([uploaded_file])[0]
+        file_hash = upload.hash
+        # File baru: putaran manual dari file sebelumnya tidak berlaku lagi
+        if st.session_state.get('file_hash') != file_hash:
+            st.session_state['file_hash'] = file_hash
+            st.session_state['rotation_angle'] = 0
+
+        page = 0
+        if is_paged(upload.name):
+            n_pages = get_page_count(file_hash, upload)
+            if n_pages > 1:
+                page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, value=1) - 1
+                st.caption("Untuk menganalisa semua halaman sekaligus, pakai Mode Batch.")
+
+        quarter, skew = get_orientation(file_hash, page, upload)
+        st.image(get_preview(file_hash, page, st.session_state['rotation_angle'], upload),
+                 caption="Preview Gambar", width='stretch')
+        if quarter or skew:
+            st.caption(f"Otomatis diputar {quarter}° dan diluruskan {skew:.1f}°")
+        
+        stream_mode = st.toggle("⚡ Tampilkan hasil bertahap (streaming)", value=True)
 
-    st.image(img_rotated, caption="Preview Gambar", width='stretch')
-    
-    # Tombol untuk memutar
-    if st.button("🔄 Putar 90°"):
-        rotate_image()
-        st.rerun()
-    
-    if st.button("🚀 Mulai Analisa"):
-        st.session_state['sudah_kirim'] = False
-        st.session_state['mat_scan'] = material_type
-        start_scan = time.time()
-        with st.spinner('Sedang membaca data ...'):
-            res = extract_data_qc(img_rotated, material_type)
-            if res:
-                st.session_state['qc_res'] = res
-                st.session_state['scan_dur'] = time.time() - start_scan
-                st.success("Analisa Selesai!")
-
-    # Tampilkan Form Verifikasi
-    if 'qc_res' in st.session_state:
-        d = st.session_state['qc_res']
-        st.metric("⏱️ Kecepatan Scan", f"{st.session_state['scan_dur']:.2f} detik")
-        mat_type = st.session_state.get('mat_scan', material_type)
+        # Tombol untuk memutar (kalau deteksi otomatis masih salah)
+        if st.button("🔄 Putar 90°"):
+            rotate_image()
+            st.rerun()
         
-        with st.form("verify_form"):
-            st.subheader(f"Data Hasil Scan {mat_type}")
-            f_mat = st.text_input("ukuran", f"{d.get('nama_film')} {d.get('lebar')}mm x {d.get('thickness')}µm")
-            f_tgl_batch = st.text_input("Tanggal Kedatangan (Batch)", d.get('tanggal_kedatangan_batch', ""))
-            # Render input field secara dinamis dari config
-            u = {} # Dictionary untuk menampung input user
-            cols = st.columns(2)
-            display_map = MAT_CONFIG[mat_type]["display_names"]
-            
-            for i, (key, label) in enumerate(display_map.items()):
-                with cols[i % 2]:
-                    u[key] = st.text_input(label, d.get(key, ""))
+        if st.button("🚀 Mulai Analisa"):
+            st.session_state['sudah_kirim'] = False
+            st.session_state['mat_scan'] = material_type
+            start_scan = time.time()
+            st.session_state['first_field_dur'] = None
+            st.session_state['last_usage'] = None
+            on_field = None
+            if stream_mode:
+                # Field yang sudah ter-decode langsung ditampilkan sambil menunggu sisa respons AI
+                live = st.empty()
+                partial = {}
+                labels = {"nama_film": "Nama Film", "lebar": "Lebar", "thickness": "Thickness",
+                          "tanggal_kedatangan_batch": "Tanggal Kedatangan (Batch)",
+                          **MAT_CONFIG[material_type]["display_names"]}
+
+                def on_field(key, value):
+                    if st.session_state['first_field_dur'] is None:
+                        st.session_state['first_field_dur'] = time.time() - start_scan
+                    partial[key] = value
+                    rows = [f"| {label} | {partial[k] or ''} |" for k, label in labels.items() if k in partial]
+                    live.markdown("| Field | Nilai |\n|---|---|\n" + "\n".join(rows))
+
+            with st.spinner('Sedang membaca data ...'), tracer.scan() as scan_id, tracer.memory(), \
+                    tracer.span("scan", material=material_type):
+                img_rotated = get_full_image(upload, page, st.session_state['rotation_angle'])
+                res = extract_data_qc(img_rotated, material_type, on_field=on_field)
+                if res:
+                    st.session_state['qc_res'] = res
+                    reset_verify_form()
+                    st.session_state['scan_id'] = scan_id
+                    st.session_state['scan_dur'] = time.time() - start_scan
+                    if stream_mode:
+                        live.empty()
+                    st.success("Analisa Selesai!")
+
+        # Tampilkan Form Verifikasi
+        if 'qc_res' in st.session_state:
+            d = st.session_state['qc_res']
+            c_speed, c_first, c_cache = st.columns(3)
+            c_speed.metric("⏱️ Kecepatan Scan", f"{st.session_state['scan_dur']:.2f} detik")
+            if st.session_state.get('first_field_dur') is not None:
+                c_first.metric("⚡ Field Pertama", f"{st.session_state['first_field_dur']:.2f} detik")
+            cache_stats = extract_cache.stats()
+            c_cache.metric("🗃️ Cache Scan", f"{cache_stats['hits']} hit / {cache_stats['misses']} miss")
+            if st.session_state.get('last_usage'):
+                usage, cost = st.session_state['last_usage']
+                st.caption(f"Token: {usage['prompt']} input ({usage['image']} gambar) + {usage['output']} output "
+                           f"≈ ${cost:.5f}")
+            mat_type = st.session_state.get('mat_scan', material_type)
             
-            if st.form_submit_button("✅ Konfirmasi & Kirim"):
-            # --- LOGIKA MAPPING KOLOM ---
-                if mat_type == "LLDPE" or mat_type == "CPP":
-                    row = [
-                            f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
-                            u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
-                            u.get('cof'), u.get('initial_seal_temp'),u.get('hasil_initial_seal'), u.get('tensile_md'), 
-                            u.get('tensile_td'), u.get('elongation_md'), u.get('elongation_td'), 
-                            u.get('modulus_md'), u.get('modulus_td'), "", "", "", u.get('supplier'), 
-                            d.get('sampling_size')
-                    ]
-                
-                elif mat_type == "PET" or mat_type == "OPP":
-                    row = [
-                            f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
-                            u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
-                            u.get('cof'),"","","","","","","","","","","",u.get('supplier'), 
-                            d.get('sampling_size')
-                        ]
-
-                elif mat_type == "VMPET":
-                    row = [
-                            f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
-                            u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
-                            "","","","","","","","","","",u.get('bonding_metalize'),"",u.get('supplier'), 
-                            d.get('sampling_size')
-                        ]
-                
-                elif mat_type == "VMCPP":
-                    row = [
-                            f_tgl_batch, u.get('tanggal'), f_mat, u.get('no_surat_jalan'), 
-                            u.get('no_po'), u.get('no_batch'), "", "Roll", u.get('jml_datang'), "", 
-                            u.get('cof'), u.get('initial_seal_temp'),u.get('hasil_initial_seal'),"","","","","","","", 
-                            u.get('bonding_metalize'),"",u.get('supplier'),d.get('sampling_size')
-                        ]
-
-                if save_to_sheets(row):
-                    st.session_state['sudah_kirim'] = True
-                    st.balloons()
-                    st.success(f"Terkirim ke Sono cukk")
-                    time.sleep(2)
-                    del st.session_state['qc_res']
+            if render_verify_form(d, mat_type, scan_id=st.session_state.get('scan_id')):
+                time.sleep(2)
+                del st.session_state['qc_res']
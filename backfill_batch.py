@@ -0,0 +1,138 @@
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from qc_config import MAT_CONFIG
+from qc_refine import refine_batch_numbers
+from qc_sheets import SheetClient, read_ranges, write_cells
+from qc_vocab import snap_batch
+
+# --- BACKFILL NOMOR BATCH DI SHEET ---
+# Baca kolom tanggal kedatangan (A), ukuran/film (C) dan no batch (F) per chunk, rapikan no batch
+# dengan refine_batch_numbers, lalu tulis HANYA sel yang berubah lewat batchUpdate.
+# Tanggal kedatangan diisi kalau masih kosong; yang berbeda dengan kode batch cuma dilaporkan.
+# Hasil refine yang formatnya tidak wajar (mis. '2511/SB/...' -> '2511//SB/...') tidak ditulis, hanya dilaporkan.
+# Default dry-run: python backfill_batch.py --credentials sa.json --sheet "QC Film"
+# Tulis ke sheet:   python backfill_batch.py --credentials sa.json --sheet-key <key> --apply
+COL_TGL_BATCH = "A"
+COL_FILM = "C"
+COL_BATCH = "F"
+FIRST_ROW = 2 # Baris 1 = header
+# Tanggal di sheet tampil sesuai locale spreadsheet (hari dulu); serial angka = hari sejak 30-12-1899
+SHEET_DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d", "%Y/%m/%d")
+SHEET_EPOCH = date(1899, 12, 30)
+
+
+def material_of(film):
+    # Kolom C diawali prefix film ("VMPET 12 ..."), prefix = key MAT_CONFIG
+    token = str(film or "").split(" ", 1)[0].upper()
+    return token if token in MAT_CONFIG else None
+
+
+def well_formed(batch):
+    # Kode tanggal 5 karakter sebagai segmen pertama, minimal 4 segmen, tidak ada segmen kosong
+    parts = batch.split("/")
+    return len(parts) >= 4 and all(parts) and len(parts[0]) == 5
+
+
+def parse_sheet_date(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return SHEET_EPOCH + timedelta(days=int(value))
+    text = str(value).strip()
+    for fmt in SHEET_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+def plan_chunk(start, tgl_col, film_col, batch_col, snap=True):
+    # Return (sel yang perlu ditulis, tanggal yang tidak cocok, hasil refine yang ditolak) untuk satu chunk
+    n = max(len(tgl_col), len(film_col), len(batch_col))
+    cell = lambda col, i: col[i][0] if i < len(col) and col[i] else ""
+    raws = [str(cell(batch_col, i)) for i in range(n)]
+    writes, mismatches, rejected = [], [], []
+    for i, (cleaned, tgl) in enumerate(refine_batch_numbers(raws)):
+        row = start + i
+        raw = raws[i]
+        if not raw:
+            continue
+        mat = material_of(cell(film_col, i))
+        if snap and mat:
+            cleaned, _ = snap_batch(mat, cleaned)
+        if not well_formed(cleaned):
+            # Tanggal dari batch yang rusak juga tidak bisa dipercaya
+            if cleaned != raw:
+                rejected.append((row, raw, cleaned))
+            continue
+        if cleaned != raw:
+            writes.append((f"{COL_BATCH}{row}", cleaned, raw))
+        if not tgl or tgl == "Tidak Terdeteksi":
+            continue
+        current = cell(tgl_col, i)
+        if not str(current).strip():
+            writes.append((f"{COL_TGL_BATCH}{row}", tgl, ""))
+        elif parse_sheet_date(current) != datetime.strptime(tgl, "%d-%m-%Y").date():
+            mismatches.append((row, raw, str(current).strip(), tgl))
+    return writes, mismatches, rejected
+
+
+def backfill(sheet, chunk=2000, apply=False, snap=True, pause=1.0, max_rows=None, log=print):
+    totals = {"rows": 0, "writes": 0, "mismatches": 0, "rejected": 0}
+    start = FIRST_ROW
+    while max_rows is None or start < FIRST_ROW + max_rows:
+        end = start + chunk - 1
+        tgl_col, film_col, batch_col = read_ranges(sheet, [
+            f"{COL_TGL_BATCH}{start}:{COL_TGL_BATCH}{end}",
+            f"{COL_FILM}{start}:{COL_FILM}{end}",
+            f"{COL_BATCH}{start}:{COL_BATCH}{end}",
+        ])
+        if not (tgl_col or film_col or batch_col):
+            break
+        writes, mismatches, rejected = plan_chunk(start, tgl_col, film_col, batch_col, snap=snap)
+        for a1, new, old in writes:
+            log(f"{a1}: {old!r} -> {new!r}")
+        for row, raw, current, tgl in mismatches:
+            log(f"baris {row}: tanggal {current!r} tidak cocok dengan kode batch {raw!r} ({tgl})")
+        for row, raw, cleaned in rejected:
+            log(f"baris {row}: no batch {raw!r} tidak ditulis, hasil rapi tidak wajar ({cleaned!r}), cek manual")
+        if apply and writes:
+            write_cells(sheet, [(a1, new) for a1, new, _ in writes])
+        totals["rows"] += max(len(tgl_col), len(film_col), len(batch_col))
+        totals["writes"] += len(writes)
+        totals["mismatches"] += len(mismatches)
+        totals["rejected"] += len(rejected)
+        start = end + 1
+        # 2 request per chunk (batchGet + batchUpdate): jeda supaya tetap di bawah kuota per menit
+        time.sleep(pause)
+    return totals
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rapikan ulang no batch dan isi tanggal kedatangan di sheet QC")
+    ap.add_argument("--credentials", required=True, help="File JSON service account")
+    ap.add_argument("--sheet", help="Nama spreadsheet")
+    ap.add_argument("--sheet-key", help="Key spreadsheet (lebih cepat dari nama)")
+    ap.add_argument("--chunk", type=int, default=2000, help="Jumlah baris per request baca")
+    ap.add_argument("--max-rows", type=int)
+    ap.add_argument("--pause", type=float, default=1.0, help="Jeda antar chunk (detik)")
+    ap.add_argument("--no-snap", action="store_true", help="Jangan cocokkan ID/IDS batch ke vocabulary")
+    ap.add_argument("--apply", action="store_true", help="Tulis perubahan ke sheet (default: dry-run)")
+    args = ap.parse_args()
+    if not (args.sheet or args.sheet_key):
+        ap.error("isi --sheet atau --sheet-key")
+
+    with open(args.credentials) as f:
+        info = json.load(f)
+    sheet = SheetClient(info, args.sheet, sheet_key=args.sheet_key).worksheet()
+    totals = backfill(sheet, chunk=args.chunk, apply=args.apply, snap=not args.no_snap,
+                      pause=args.pause, max_rows=args.max_rows)
+    mode = "ditulis" if args.apply else "dry-run, tidak ditulis"
+    print(f"{totals['rows']} baris dicek, {totals['writes']} sel berubah ({mode}), "
+          f"{totals['mismatches']} tanggal tidak cocok, {totals['rejected']} no batch perlu dicek manual")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import time
+
+import google.generativeai as genai
+
+from bench_preprocess import load_corpus, percentile, _norm
+from qc_backends import stub_model_factory, usage_of
+from qc_cassette import Cassette, cassette_model_factory, REPLAY, RECORD
+from qc_config import MAT_CONFIG
+from qc_model import ModelCaller
+from qc_pipeline import (build_request, upload_bytes, finish_parsed, decode_image, prepare_image,
+                         DECODE_SIDE)
+from qc_prompt import PROMPT_MODES
+from qc_refine import parse_model_output
+from qc_usage import cost_of
+
+# --- BENCHMARK GOLDEN SET (AKURASI PER FIELD, LATENCY, BYTE, TOKEN) ---
+# Corpus sama dengan bench_preprocess: <dir>/<MATERIAL>/<nama>.jpg + <nama>.json (hasil yang sudah dicek manual).
+# Jalur ekstraksi sama dengan app (qc_pipeline + ModelCaller), backend:
+#   stub   : StubModel lokal (cek pipeline & latency tanpa API, akurasi tidak bermakna)
+#   replay : putar ulang cassette (--cassette), hasil AI sama persis antar commit
+#   record : panggil Gemini dan rekam ke --cassette
+#   gemini : panggil Gemini langsung
+# Hasil disimpan ke --out (JSON) supaya bisa dibandingkan antar commit dengan --baseline.
+# Contoh: python bench_golden.py corpus/ --backend replay --cassette golden.jsonl --speed 0 --baseline .qc_bench/abc123.json
+BACKENDS = ("stub", "replay", "record", "gemini")
+BATCH_FIELD = "no_batch"
+
+
+def git_label():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d-%H%M%S")
+
+
+def make_caller(args):
+    if args.backend == "stub":
+        factory = stub_model_factory(args.stub_median, args.stub_p95)
+    elif args.backend == "replay":
+        factory = cassette_model_factory(Cassette(args.cassette, REPLAY, speed=args.speed))
+    else:
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        factory = genai.GenerativeModel
+        if args.backend == "record":
+            factory = cassette_model_factory(Cassette(args.cassette, RECORD), factory)
+    # Tanpa fallback: benchmark mengukur satu model, bukan campuran
+    return ModelCaller(args.model, None, model_factory=factory)
+
+
+def run_item(caller, mat, path, roi, prompt_mode, decode_side=DECODE_SIDE):
+    start = time.perf_counter()
+    # Decode + orientasi otomatis sama dengan app (Mode Batch)
+    image = prepare_image(decode_image(path, path, decode_side=decode_side))
+    parts, generation_config, _ = build_request(image, mat, roi=roi, prompt_mode=prompt_mode)
+    response, attempts = caller.generate(parts, generation_config=generation_config)
+    # Parse sekali saja: no_batch mentah diambil sebelum dirapikan
+    raw, status = parse_model_output(response.text)
+    raw_batch = raw.get(BATCH_FIELD) or ""
+    result = finish_parsed(raw, status, mat)
+    usage = usage_of(response)
+    return {
+        "latency": time.perf_counter() - start,
+        "bytes": upload_bytes(parts),
+        "usage": usage,
+        "cost": cost_of(attempts[-1]["model"], usage),
+        "attempts": len(attempts),
+        "raw_batch": raw_batch,
+        "result": result,
+    }
+
+
+def score(runs):
+    # runs: list (mat, truth, hasil run_item atau None kalau error)
+    fields, batch_raw, batch_refined = {}, [], []
+    for mat, truth, run in runs:
+        result = run["result"] if run else {}
+        for key, expected in truth.items():
+            if key.startswith("_"):
+                continue
+            hit = _norm(result.get(key)) == _norm(expected)
+            if key == BATCH_FIELD:
+                # no_batch dihitung terpisah: sebelum dan sesudah refine_batch_number
+                batch_refined.append(hit)
+                batch_raw.append(bool(run) and _norm(run["raw_batch"]) == _norm(expected))
+            else:
+                fields.setdefault(key, []).append(hit)
+    per_field = {key: sum(hits) / len(hits) for key, hits in sorted(fields.items())}
+    all_hits = [h for hits in fields.values() for h in hits]
+    return {
+        "fields": per_field,
+        "overall": sum(all_hits) / len(all_hits) if all_hits else None,
+        "no_batch_raw": sum(batch_raw) / len(batch_raw) if batch_raw else None,
+        "no_batch_refined": sum(batch_refined) / len(batch_refined) if batch_refined else None,
+    }
+
+
+def summarize(runs):
+    ok = [run for _, _, run in runs if run]
+    lat = [run["latency"] for run in ok]
+    usage = [run["usage"] for run in ok if run["usage"]]
+    summary = {
+        "items": len(runs),
+        "errors": len(runs) - len(ok),
+        "p50": percentile(lat, 50) if lat else None,
+        "p95": percentile(lat, 95) if lat else None,
+        "avg_bytes": statistics.mean(run["bytes"] for run in ok) if ok else None,
+        "avg_prompt_tokens": statistics.mean(u["prompt"] for u in usage) if usage else None,
+        "avg_output_tokens": statistics.mean(u["output"] for u in usage) if usage else None,
+        "avg_cost": statistics.mean(run["cost"] for run in ok) if usage else None,
+        "retries": sum(run["attempts"] - 1 for run in ok),
+    }
+    summary.update(score(runs))
+    return summary
+
+
+def _fmt(value, pct=False):
+    if value is None:
+        return "-"
+    return f"{value * 100:.1f}%" if pct else f"{value:.2f}" if isinstance(value, float) else str(value)
+
+
+def print_report(summary, baseline=None):
+    rows = [
+        ("items", "items", False), ("errors", "errors", False), ("retries", "retries", False),
+        ("latency p50 s", "p50", False), ("latency p95 s", "p95", False),
+        ("avg KB upload", "avg_kb", False), ("avg prompt tok", "avg_prompt_tokens", False),
+        ("avg output tok", "avg_output_tokens", False), ("avg USD/scan", "avg_cost_usd", False),
+        ("akurasi (tanpa no_batch)", "overall", True),
+        ("no_batch mentah", "no_batch_raw", True), ("no_batch refine", "no_batch_refined", True),
+    ]
+    for s in (summary, baseline):
+        if s and s.get("avg_bytes") is not None:
+            s["avg_kb"] = s["avg_bytes"] / 1024
+        if s and s.get("avg_cost") is not None:
+            s["avg_cost_usd"] = f"{s['avg_cost']:.5f}"
+    label = summary["label"]
+    base_label = baseline["label"] if baseline else ""
+    print(f"{'metrik':<26} {label:>16} {base_label:>16}")
+    for title, key, pct in rows:
+        base = _fmt(baseline.get(key), pct) if baseline else ""
+        print(f"{title:<26} {_fmt(summary.get(key), pct):>16} {base:>16}")
+    print()
+    print(f"{'field':<26} {label:>16} {base_label:>16}")
+    for key, acc in summary["fields"].items():
+        base = _fmt(baseline["fields"].get(key), True) if baseline else ""
+        print(f"{key:<26} {_fmt(acc, True):>16} {base:>16}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark golden set: akurasi per field, latency, byte upload, token")
+    ap.add_argument("corpus")
+    ap.add_argument("--backend", choices=BACKENDS, default="stub")
+    ap.add_argument("--cassette", help="File cassette untuk backend replay/record")
+    ap.add_argument("--speed", type=float, default=1.0, help="Pengali latency rekaman saat replay (0 = tanpa delay)")
+    ap.add_argument("--model", default="gemini-2.5-flash")
+    ap.add_argument("--roi", action="store_true", help="Kirim crop header + tabel, bukan satu halaman penuh (app: ROI_CROP)")
+    ap.add_argument("--prompt", choices=PROMPT_MODES, default="compiled")
+    ap.add_argument("--decode-side", type=int, default=DECODE_SIDE,
+                    help="Decode JPEG langsung di skala kecil (draft); default sama dengan app, 0 = resolusi penuh")
+    ap.add_argument("--stub-median", type=float, default=0.05)
+    ap.add_argument("--stub-p95", type=float, default=0.2)
+    ap.add_argument("--label", default=None, help="Nama run, default hash commit git")
+    ap.add_argument("--out", default=None, help="File JSON hasil, default .qc_bench/<label>.json")
+    ap.add_argument("--baseline", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    args = ap.parse_args()
+    if args.backend in ("replay", "record") and not args.cassette:
+        ap.error(f"--backend {args.backend} butuh --cassette")
+
+    caller = make_caller(args)
+    runs = []
+    for mat, path, truth in load_corpus(args.corpus):
+        try:
+            run = run_item(caller, mat, path, roi=args.roi, prompt_mode=args.prompt,
+                           decode_side=args.decode_side)
+        except Exception as e:
+            print(f"ERROR {path}: {type(e).__name__}: {e}")
+            run = None
+        runs.append((mat, truth, run))
+
+    summary = summarize(runs)
+    summary["label"] = args.label or git_label()
+    summary["backend"] = args.backend
+    summary["prompt"] = args.prompt
+    summary["decode_side"] = args.decode_side
+    summary["roi"] = args.roi
+    summary["by_material"] = {
+        mat: summarize([r for r in runs if r[0] == mat])["overall"] for mat in MAT_CONFIG if any(r[0] == mat for r in runs)
+    }
+
+    out = args.out or os.path.join(".qc_bench", f"{summary['label']}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+    print(f"\nHasil disimpan ke {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+from qc_image import detect_orientation
+
+# --- CEK REGRESI DETEKSI ORIENTASI ---
+# Checksheet sintetis (header teks + tabel pengujian bergaris di bawah, atau halaman teks saja)
+# diputar 0/90/180/270 lalu dimiringkan sedikit; deteksi harus mengembalikan putaran yang benar.
+# Contoh: python bench_orient.py            (exit code 1 kalau ada yang salah)
+QUARTERS = (0, 90, 180, 270)
+TILTS = (-5.0, -3.0, -2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0, 3.0, 5.0)
+SKEW_TOLERANCE = 0.5 # Derajat
+
+
+def make_page(table=True, width=1240, height=1754):
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    words = ["No. Batch", "25A10/HHK08/0001/FZF", "Surat Jalan", "SJ-2510-0012", "PO", "4500012345",
+             "Supplier", "Ukuran", "1200mm x 30um", "Tanggal", "12-10-2025", "Roll", "COF 0.12 / 0.14"]
+    # Isi dan posisi tiap baris berbeda (seperti tulisan tangan), supaya kolom huruf tidak segaris sempurna
+    for i, y in enumerate(range(120, 700 if table else height - 120, 34)):
+        line = "  ".join(words[(i * 5 + k) % len(words)] for k in range(4 + i % 5))
+        draw.text((100 + (i * 37) % 90, y), line, fill=0)
+    if table:
+        # Tabel pengujian: garis horizontal panjang di setengah bawah
+        for y in range(900, height - 150, 60):
+            draw.line((90, y, width - 90, y), fill=0, width=3)
+            draw.text((110, y + 20), "Tensile MD 35.2   TD 33.1   Elongation > 1400", fill=0)
+        for x in (90, 500, 850, width - 90):
+            draw.line((x, 900, x, 900 + 60 * ((height - 150 - 900) // 60)), fill=0, width=3)
+    return img
+
+
+def place(page, quarter, tilt):
+    # Kebalikan apply_orientation: halaman tegak diputar quarter (searah jarum jam) lalu dimiringkan tilt
+    img = page.rotate(-quarter, expand=True) if quarter else page
+    if tilt:
+        img = img.rotate(-tilt, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    return img
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cek deteksi orientasi pada checksheet sintetis yang miring")
+    ap.parse_args()
+    failures = 0
+    total = 0
+    start = time.perf_counter()
+    for kind, page in (("tabel", make_page(table=True)), ("teks", make_page(table=False))):
+        for quarter in QUARTERS:
+            for tilt in TILTS:
+                got_q, got_skew = detect_orientation(place(page, quarter, tilt))
+                # Halaman teks saja tidak punya tanda atas/bawah: 0 dan 180 sama-sama dianggap benar
+                ok_q = got_q == quarter if kind == "tabel" else got_q % 180 == quarter % 180
+                ok_skew = abs(got_skew - tilt) <= SKEW_TOLERANCE
+                total += 1
+                if not (ok_q and ok_skew):
+                    failures += 1
+                    print(f"SALAH {kind}: putar {quarter}° miring {tilt}° -> terdeteksi {got_q}° miring {got_skew}°")
+    print(f"{total - failures}/{total} benar ({time.perf_counter() - start:.1f} detik)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
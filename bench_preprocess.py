@@ -0,0 +1,137 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import time
+
+import google.generativeai as genai
+
+from qc_cassette import Cassette, cassette_model_factory, REPLAY, RECORD
+from qc_config import MAT_CONFIG
+from qc_image import load_image, prepare_regions, as_parts
+from qc_refine import parse_model_json, apply_refinery
+from qc_schema import build_response_schema, normalize_result
+
+# --- BENCHMARK PREPROCESSING GAMBAR ---
+# Corpus: <dir>/<MATERIAL>/<nama>.jpg + <nama>.json (hasil yang sudah dicek manual).
+# Contoh: GEMINI_API_KEY=... python bench_preprocess.py corpus/ --cassette bench.jsonl --record
+# lalu tanpa API: python bench_preprocess.py corpus/ --cassette bench.jsonl --speed 0
+SETTINGS = {
+    # Setara jalur lama app.py (thumbnail 1600) dan app2.py (thumbnail 3000), tanpa budget byte
+    "raw-1600": dict(budget={"max_side": 1600, "max_bytes": 10**9}, grayscale=False, contrast=False),
+    "raw-3000": dict(budget={"max_side": 3000, "max_bytes": 10**9}, grayscale=False, contrast=False),
+    "budget-jpeg": dict(fmt="JPEG"),
+    "budget-webp": dict(fmt="WEBP"),
+    "budget-jpeg-color": dict(fmt="JPEG", grayscale=False),
+    # Crop header + tabel pengujian sebagai gambar terpisah
+    "roi-jpeg": dict(fmt="JPEG", roi=True),
+}
+IMAGE_EXT = (".jpg", ".jpeg", ".png")
+# Perkiraan token gambar Gemini: gambar <= 384 px di kedua sisi 258 token, selebihnya 258 token per tile 768x768
+TILE_SIDE = 768
+TILE_TOKENS = 258
+
+
+def load_corpus(root):
+    items = []
+    for mat in sorted(os.listdir(root)):
+        if mat not in MAT_CONFIG:
+            continue
+        folder = os.path.join(root, mat)
+        for name in sorted(os.listdir(folder)):
+            stem, ext = os.path.splitext(name)
+            truth = os.path.join(folder, stem + ".json")
+            if ext.lower() in IMAGE_EXT and os.path.exists(truth):
+                with open(truth, encoding="utf-8") as f:
+                    items.append((mat, os.path.join(folder, name), json.load(f)))
+    return items
+
+
+def _norm(v):
+    return str(v or "").strip().upper()
+
+
+def field_accuracy(result, truth):
+    keys = [k for k in truth if not k.startswith("_")]
+    if not keys:
+        return 1.0
+    return sum(_norm(result.get(k)) == _norm(truth[k]) for k in keys) / len(keys)
+
+
+def image_tokens(prepared):
+    w, h = prepared["width"], prepared["height"]
+    if w <= 384 and h <= 384:
+        return TILE_TOKENS
+    return TILE_TOKENS * math.ceil(w / TILE_SIDE) * math.ceil(h / TILE_SIDE)
+
+
+def percentile(vals, p):
+    vals = sorted(vals)
+    return vals[min(len(vals) - 1, int(round(p / 100 * (len(vals) - 1))))]
+
+
+def run_setting(model, corpus, opts, repeat):
+    sizes, tokens, lat, acc, errors = [], [], [], [], 0
+    for mat, path, truth in corpus:
+        cfg = dict(opts)
+        budget = {**MAT_CONFIG[mat]["image_budget"], **cfg.pop("budget", {})}
+        layout = MAT_CONFIG[mat]["layout"] if cfg.pop("roi", False) else None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            regions = prepare_regions(load_image(path), layout, budget, **cfg)
+            try:
+                generation_config = genai.GenerationConfig(
+                    response_mime_type="application/json", response_schema=build_response_schema(mat)
+                )
+                response = model.generate_content(
+                    [MAT_CONFIG[mat]["prompt"]] + as_parts(regions), generation_config=generation_config
+                )
+                result = apply_refinery(normalize_result(parse_model_json(response.text), mat))
+            except Exception:
+                errors += 1
+                result = {}
+            lat.append(time.perf_counter() - start)
+            sizes.append(sum(len(prepared["data"]) for _, prepared in regions))
+            tokens.append(sum(image_tokens(prepared) for _, prepared in regions))
+            acc.append(field_accuracy(result, truth))
+    return {
+        "bytes": statistics.mean(sizes),
+        "tokens": statistics.mean(tokens),
+        "p50": percentile(lat, 50),
+        "p95": percentile(lat, 95),
+        "acc": statistics.mean(acc),
+        "errors": errors,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bandingkan setting preprocessing: ukuran upload, latency, akurasi field")
+    ap.add_argument("corpus")
+    ap.add_argument("--settings", nargs="*", default=list(SETTINGS))
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--model", default="gemini-2.5-flash")
+    ap.add_argument("--cassette", help="File JSONL untuk rekam/putar ulang respons AI")
+    ap.add_argument("--record", action="store_true", help="Panggil API asli dan rekam ke --cassette")
+    ap.add_argument("--speed", type=float, default=1.0, help="Pengali latency rekaman saat replay (0 = tanpa delay)")
+    args = ap.parse_args()
+
+    if args.cassette and not args.record:
+        cassette = Cassette(args.cassette, REPLAY, speed=args.speed)
+        model = cassette_model_factory(cassette)(args.model)
+    else:
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        factory = genai.GenerativeModel
+        if args.cassette:
+            factory = cassette_model_factory(Cassette(args.cassette, RECORD), factory)
+        model = factory(args.model)
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} gambar, repeat {args.repeat}\n")
+    print(f"{'setting':<20} {'avg KB':>8} {'tok img':>8} {'p50 s':>7} {'p95 s':>7} {'akurasi':>8} {'error':>6}")
+    for name in args.settings:
+        r = run_setting(model, corpus, SETTINGS[name], args.repeat)
+        print(f"{name:<20} {r['bytes']/1024:>8.1f} {r['tokens']:>8.0f} {r['p50']:>7.2f} {r['p95']:>7.2f} {r['acc']*100:>7.1f}% {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import sys
+
+from qc_vocab import snap_field
+
+# --- CEK REGRESI SNAP VOCABULARY ---
+# Salah baca yang harus dikoreksi, dan nilai yang harus dibiarkan (angka grade/ketebalan yang memang lain).
+# Contoh: python bench_vocab.py            (exit code 1 kalau ada yang salah)
+CASES = [
+    # (material, field, hasil AI, hasil snap yang benar)
+    ("PET", "nama_film", "PET IF-8", "PET IF-8"),
+    ("OPP", "nama_film", "OPP SF-17", "OPP SF-17"),
+    ("LLDPE", "nama_film", "LLDPE C8 WHITE", "LLDPE C8 WHITE"),
+    ("LLDPE", "nama_film", "LLDPE C4 VACUUM", "LLDPE C4 VACUUM"),
+    ("PET", "nama_film", "PET IF-I2", "PET IF-12"),
+    ("LLDPE", "nama_film", "LLDPE CB VACUUM", "LLDPE C8 VACUUM"),
+    ("LLDPE", "nama_film", "LLDPE C8 VACUM", "LLDPE C8 VACUUM"),
+    ("LLDPE", "nama_film", "LLDPE SP(I7)", "LLDPE SP(17)"),
+    ("OPP", "nama_film", "OPP SF 2O", "OPP SF-20"),
+    ("CPP", "nama_film", "CPP HHKO8", "CPP HHK08"),
+    ("PET", "thickness", "8", "8"),
+    ("OPP", "thickness", "17", "17"),
+    ("PET", "thickness", "I2", "12"),
+    ("OPP", "thickness", "1B", "18"),
+]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cek snap nama film / ketebalan ke vocabulary material")
+    ap.parse_args()
+    failures = 0
+    for mat, key, value, expected in CASES:
+        got, dist = snap_field(mat, key, value)
+        if got != expected:
+            failures += 1
+            print(f"SALAH {mat} {key}: {value!r} -> {got!r} (jarak {dist}), seharusnya {expected!r}")
+    print(f"{len(CASES) - failures}/{len(CASES)} benar")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
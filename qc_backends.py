@@ -0,0 +1,320 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from qc_config import MAT_CONFIG
+from qc_schema import film_names
+from qc_sheets import LatencyLog, SHEET_HEADER
+
+# --- BACKEND LOKAL UNTUK LOAD TEST / PROFILING TANPA KREDENSIAL ---
+# StubModel meniru google.generativeai.GenerativeModel (generate_content, stream, async) dan
+# mengembalikan JSON per material yang deterministik (seed dari hash gambar) setelah delay acak.
+# MemorySheetClient meniru SheetClient + worksheet gspread di memori.
+EXTRACT_BACKENDS = ("gemini", "stub")
+SHEET_BACKENDS = ("gspread", "memory")
+
+
+class LatencyDist:
+    # Lognormal dari median dan p95: bentuk umum latency API (ekor panjang ke kanan)
+    def __init__(self, median=3.0, p95=8.0, seed=0):
+        self.mu = math.log(median)
+        self.sigma = max(1e-6, (math.log(p95) - self.mu) / 1.645)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            return self._rng.lognormvariate(self.mu, self.sigma)
+
+
+def _material_of(parts):
+    prompt = next((p for p in parts if isinstance(p, str)), "")
+    for mat, cfg in MAT_CONFIG.items():
+        if cfg["prompt"] == prompt:
+            return mat
+    # Prompt diubah/dikompilasi: cocokkan dari nama material yang disebut paling awal
+    hits = [(prompt.find(mat), mat) for mat in MAT_CONFIG if prompt.find(mat) != -1]
+    return min(hits)[1] if hits else next(iter(MAT_CONFIG))
+
+
+def _seed_of(parts):
+    h = hashlib.sha256()
+    for p in parts:
+        if isinstance(p, dict) and "data" in p:
+            h.update(p["data"])
+    return int.from_bytes(h.digest()[:8], "big")
+
+
+def canned_result(material_type, seed=0):
+    rng = random.Random(seed)
+    cfg = MAT_CONFIG[material_type]
+    vocab = cfg["vocab"]
+    if vocab.get("thickness"):
+        thickness = rng.choice(vocab["thickness"])
+        film = f"{vocab['film_prefix']} {rng.choice(vocab['film_variants'])}-{thickness}"
+    else:
+        thickness = str(rng.choice([20, 25, 30, 40, 50, 75]))
+        film = rng.choice(film_names(vocab))
+    lebar = str(rng.choice([600, 700, 790, 850, 1000]))
+    yy, m, dd = rng.choice(["24", "25"]), rng.choice("123456789ABC"), f"{rng.randint(1, 28):02d}"
+    date_code = f"{yy}{m}{dd}"
+    values = {
+        "tanggal": f"{dd}-{rng.randint(1, 12):02d}-20{yy}",
+        "nama_film": film,
+        "ukuran": f"{thickness} μm x {lebar} mm",
+        "lebar": lebar,
+        "thickness": thickness,
+        "no_surat_jalan": f"SJ{rng.randint(10**7, 10**8 - 1)}",
+        "no_po": f"PO-{rng.randint(10, 99)}-{rng.randint(10**5, 10**6 - 1)}",
+        "no_batch": f"{date_code}/{rng.choice(vocab['batch_id'])}/{date_code}/{rng.choice(vocab['batch_ids'])}",
+        "jml_datang": str(rng.randint(1, 40)),
+        "cof": f"0.{rng.randint(10, 40)} / 0.{rng.randint(10, 40)}",
+        "initial_seal_temp": str(rng.choice([110, 120, 130])),
+        "hasil_initial_seal": f"{rng.uniform(1, 5):.2f}",
+        "tensile_md": f"{rng.uniform(20, 60):.1f}",
+        "tensile_td": f"{rng.uniform(20, 60):.1f}",
+        "elongation_md": str(rng.randint(400, 900)),
+        "elongation_td": str(rng.randint(400, 900)),
+        "modulus_md": str(rng.randint(100, 300)),
+        "modulus_td": str(rng.randint(100, 300)),
+        "bonding_metalize": f"0.{rng.randint(10, 99)}",
+        "supplier": rng.choice(vocab["suppliers"]),
+        "sampling_size": str(rng.choice([3, 5, 8])),
+    }
+    return {key: values.get(key, "") for key in cfg["fields"]}
+
+
+# --- JUMLAH TOKEN (usage_metadata) ---
+USAGE_FIELDS = {
+    "prompt": "prompt_token_count",
+    "output": "candidates_token_count",
+    "cached": "cached_content_token_count",
+    "total": "total_token_count",
+}
+IMAGE_TOKENS = 258 # Perkiraan token per gambar (satu tile Gemini), hanya untuk stub
+
+
+class _ModalityCount:
+    def __init__(self, modality, token_count):
+        self.modality = modality
+        self.token_count = token_count
+
+
+class StubUsage:
+    def __init__(self, usage):
+        for key, attr in USAGE_FIELDS.items():
+            setattr(self, attr, usage.get(key) or 0)
+        self.prompt_tokens_details = [_ModalityCount("IMAGE", usage.get("image") or 0)]
+
+
+def usage_of(response):
+    # usage_metadata respons Gemini (atau stub) -> dict sederhana; None kalau backend tidak melaporkan token
+    meta = getattr(response, "usage_metadata", None)
+    if meta is None:
+        return None
+    usage = {key: getattr(meta, attr, 0) or 0 for key, attr in USAGE_FIELDS.items()}
+    # Rincian per modality (versi API baru): bagian prompt yang berasal dari gambar
+    usage["image"] = sum(d.token_count for d in getattr(meta, "prompt_tokens_details", None) or []
+                         if getattr(d.modality, "name", d.modality) == "IMAGE")
+    return usage
+
+
+def estimate_usage(parts, text):
+    # Kasar: ~4 karakter per token teks, satu tile per gambar
+    image = sum(IMAGE_TOKENS for p in parts if isinstance(p, dict))
+    prompt = image + sum(math.ceil(len(p) / 4) for p in parts if isinstance(p, str))
+    output = math.ceil(len(text) / 4)
+    return {"prompt": prompt, "image": image, "output": output, "cached": 0, "total": prompt + output}
+
+
+class StubResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = StubUsage(usage) if usage else None
+
+
+class StubModel:
+    # cached: handle dari StubContextBackend; prefix-nya dianggap sudah ada di sisi server
+    def __init__(self, model_name, latency=None, chunks=6, cached=None, speedup=1.0):
+        self.model_name = model_name
+        self.latency = latency or LatencyDist()
+        self.chunks = chunks
+        self.cached = cached
+        self.speedup = speedup
+
+    def _with_prefix(self, parts):
+        if self.cached is None:
+            return list(parts)
+        if time.time() > self.cached["expire"]:
+            raise LookupError(f"stub: cached content {self.cached['name']} sudah kedaluwarsa")
+        return [self.cached["text"]] + list(parts)
+
+    def _usage(self, parts, text):
+        usage = estimate_usage(parts, text)
+        if self.cached is not None:
+            usage["cached"] = math.ceil(len(self.cached["text"]) / 4)
+        return usage
+
+    def _respond(self, parts):
+        return json.dumps(canned_result(_material_of(parts), _seed_of(parts)), ensure_ascii=False)
+
+    def _check_timeout(self, delay, request_options):
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"stub: {delay:.1f}s > timeout {timeout:.1f}s")
+
+    def generate_content(self, parts, generation_config=None, stream=False, request_options=None):
+        parts = self._with_prefix(parts)
+        delay = self.latency.sample() * self.speedup
+        self._check_timeout(delay, request_options)
+        text = self._respond(parts)
+        usage = self._usage(parts, text)
+        if stream:
+            return self._stream(text, delay, usage)
+        time.sleep(delay)
+        return StubResponse(text, usage)
+
+    def _stream(self, text, delay, usage):
+        # Chunk pertama datang setelah ~40% delay (time-to-first-token), sisanya merata
+        size = max(1, math.ceil(len(text) / self.chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        time.sleep(delay * 0.4)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(delay * 0.6 / max(1, len(pieces) - 1))
+            # Seperti Gemini: total token ada di chunk terakhir
+            yield StubResponse(piece, usage if i == len(pieces) - 1 else None)
+
+    async def generate_content_async(self, parts, generation_config=None, request_options=None):
+        parts = self._with_prefix(parts)
+        delay = self.latency.sample() * self.speedup
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"stub: {delay:.1f}s > timeout {timeout:.1f}s")
+        await asyncio.sleep(delay)
+        text = self._respond(parts)
+        return StubResponse(text, self._usage(parts, text))
+
+
+def stub_model_factory(median=3.0, p95=8.0, seed=0):
+    latency = LatencyDist(median, p95, seed)
+    return lambda name: StubModel(name, latency)
+
+
+class StubContextBackend:
+    # Emulasi context cache Gemini: prefix disimpan di memori dengan waktu kedaluwarsa,
+    # model yang terikat ke cache lebih cepat (speedup) dan melaporkan token cache di usage.
+    # min_tokens 0 supaya prompt pendek pun tetap lewat jalur cache saat dites offline.
+    min_tokens = 0
+
+    def __init__(self, latency=None, speedup=0.8):
+        self.latency = latency or LatencyDist()
+        self.speedup = speedup
+        self._seq = 0
+
+    def count_tokens(self, model_name, text):
+        return math.ceil(len(text) / 4)
+
+    def create(self, model_name, text, ttl):
+        self._seq += 1
+        return {"name": f"cachedContents/stub-{self._seq}", "model": model_name, "text": text,
+                "expire": time.time() + ttl}
+
+    def refresh(self, handle, ttl):
+        handle["expire"] = time.time() + ttl
+
+    def delete(self, handle):
+        handle["expire"] = 0
+
+    def bind(self, handle):
+        return StubModel(handle["model"], self.latency, cached=handle, speedup=self.speedup)
+
+
+# --- SHEET DI MEMORI ---
+_A1 = re.compile(r"([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?")
+
+
+def _col_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _parse_a1(a1):
+    c1, r1, c2, r2 = _A1.fullmatch(a1.split("!")[-1]).groups()
+    return _col_index(c1), int(r1), _col_index(c2 or c1), int(r2 or r1)
+
+
+class MemoryWorksheet:
+    def __init__(self, title="Sheet1", latency=None):
+        self.title = title
+        # Sama seperti sheet produksi: baris 1 header, data mulai baris 2
+        self.rows = [list(SHEET_HEADER)]
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency.sample())
+
+    def append_rows(self, values, value_input_option=None, insert_data_option=None, table_range=None):
+        self._wait()
+        with self._lock:
+            first = len(self.rows) + 1
+            self.rows.extend([list(r) for r in values])
+            last = len(self.rows)
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:X{last}", "updatedRows": len(values)}}
+
+    def get_all_values(self):
+        self._wait()
+        with self._lock:
+            return [list(r) for r in self.rows]
+
+    def batch_get(self, ranges):
+        self._wait()
+        out = []
+        with self._lock:
+            for a1 in ranges:
+                c1, r1, c2, r2 = _parse_a1(a1)
+                block = [[(row[c] if c < len(row) else "") for c in range(c1, c2 + 1)]
+                         for row in self.rows[r1 - 1:r2]]
+                # Seperti Sheets API: baris kosong di akhir range tidak dikembalikan
+                while block and not any(block[-1]):
+                    block.pop()
+                out.append(block)
+        return out
+
+    def batch_update(self, data, value_input_option=None):
+        self._wait()
+        with self._lock:
+            for item in data:
+                c1, r1, _, _ = _parse_a1(item["range"])
+                for dr, values in enumerate(item["values"]):
+                    while len(self.rows) < r1 + dr:
+                        self.rows.append([])
+                    row = self.rows[r1 + dr - 1]
+                    for dc, value in enumerate(values):
+                        while len(row) <= c1 + dc:
+                            row.append("")
+                        row[c1 + dc] = value
+        return {"totalUpdatedCells": sum(len(v) for item in data for v in item["values"])}
+
+
+class MemorySheetClient(LatencyLog):
+    def __init__(self, latency=None):
+        super().__init__()
+        self._sheet = MemoryWorksheet(latency=latency)
+
+    def worksheet(self):
+        return self._sheet
+
+    def reset(self):
+        pass
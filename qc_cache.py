@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- CACHE HASIL EKSTRAKSI (DISK, LRU) ---
+# Key = hash gambar ternormalisasi + tipe material + versi prompt.
+# Disimpan di SQLite supaya tetap ada walau browser di-refresh / tab baru / server restart.
+DEFAULT_CACHE_PATH = os.path.join(".qc_cache", "extract_cache.sqlite")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def prompt_version(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def image_hash(data):
+    # Hash byte gambar hasil preprocessing (sudah diputar, di-resize dan di-encode ulang),
+    # bukan byte file upload, jadi foto yang sama dengan metadata/kompresi beda tetap cocok
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(img_hash, material_type, prompt_ver):
+    return f"{img_hash}:{material_type}:{prompt_ver}"
+
+
+class ExtractionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache(last_access)")
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, data):
+        value = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    # Buang entry yang paling lama tidak dipakai sampai total ukuran di bawah batas
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
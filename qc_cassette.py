@@ -0,0 +1,210 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+
+from qc_backends import StubResponse, usage_of
+from qc_sheets import LatencyLog
+
+# --- REKAM / PUTAR ULANG PANGGILAN AI & SHEETS (CASSETTE) ---
+# Mode "record": panggilan asli dijalankan, request fingerprint + respons + latency disimpan ke file JSONL.
+# Mode "replay": respons diambil dari file dengan latency rekaman (speed=1) atau tanpa delay (speed=0),
+# jadi benchmark dan regresi bisa diulang offline dengan respons AI yang sama persis.
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+def _config_key(cfg):
+    if cfg is None:
+        return None
+    if dataclasses.is_dataclass(cfg):
+        cfg = dataclasses.asdict(cfg)
+    if isinstance(cfg, dict):
+        # GenerationConfig dan dict dengan isi yang sama harus menghasilkan fingerprint yang sama
+        cfg = {k: v for k, v in cfg.items() if v is not None}
+    try:
+        return json.loads(json.dumps(cfg, sort_keys=True, default=str))
+    except TypeError:
+        return repr(cfg)
+
+
+def model_fingerprint(model_name, parts, generation_config=None):
+    h = hashlib.sha256()
+    h.update(model_name.encode())
+    for p in parts:
+        if isinstance(p, dict) and "data" in p:
+            h.update(p.get("mime_type", "").encode())
+            h.update(hashlib.sha256(p["data"]).digest())
+        else:
+            h.update(str(p).encode("utf-8"))
+    h.update(json.dumps(_config_key(generation_config), sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def sheet_fingerprint(op, payload):
+    return hashlib.sha256(f"{op}:{json.dumps(payload, sort_keys=True, default=str)}".encode()).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path, mode=REPLAY, speed=1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Mode cassette tidak dikenal: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._cursor = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, entry):
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def lookup(self, key):
+        # Request yang sama dipanggil berkali-kali diputar berurutan sesuai rekaman, lalu yang terakhir diulang
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"Tidak ada rekaman untuk request {key[:12]} di {self.path}")
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            self.hits += 1
+            return entries[min(i, len(entries) - 1)]
+
+    def delay(self, seconds):
+        return max(0.0, seconds * self.speed)
+
+
+class CassetteModel:
+    def __init__(self, model_name, inner, cassette):
+        self.model_name = model_name
+        self.inner = inner
+        self.cassette = cassette
+
+    def _key(self, parts, generation_config):
+        return model_fingerprint(self.model_name, parts, generation_config)
+
+    def generate_content(self, parts, generation_config=None, stream=False, request_options=None):
+        key = self._key(parts, generation_config)
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.lookup(key)
+            if stream:
+                return self._replay_stream(entry)
+            time.sleep(self.cassette.delay(entry["latency"]))
+            return StubResponse(entry["text"], entry.get("usage"))
+
+        start = time.perf_counter()
+        if stream:
+            return self._record_stream(key, parts, generation_config, request_options, start)
+        response = self.inner.generate_content(parts, generation_config=generation_config,
+                                               request_options=request_options)
+        self.cassette.record({"kind": "model", "key": key, "model": self.model_name, "text": response.text,
+                              "latency": time.perf_counter() - start, "usage": usage_of(response)})
+        return response
+
+    def _record_stream(self, key, parts, generation_config, request_options, start):
+        chunks, usage = [], None
+        for chunk in self.inner.generate_content(parts, generation_config=generation_config, stream=True,
+                                                 request_options=request_options):
+            chunks.append([time.perf_counter() - start, chunk.text])
+            usage = usage_of(chunk) or usage
+            yield chunk
+        self.cassette.record({"kind": "model", "key": key, "model": self.model_name,
+                              "text": "".join(text for _, text in chunks),
+                              "latency": time.perf_counter() - start, "chunks": chunks, "usage": usage})
+
+    def _replay_stream(self, entry):
+        chunks = entry.get("chunks") or [[entry["latency"], entry["text"]]]
+        prev = 0.0
+        for i, (offset, text) in enumerate(chunks):
+            time.sleep(self.cassette.delay(offset - prev))
+            prev = offset
+            yield StubResponse(text, entry.get("usage") if i == len(chunks) - 1 else None)
+
+    async def generate_content_async(self, parts, generation_config=None, request_options=None):
+        key = self._key(parts, generation_config)
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.lookup(key)
+            await asyncio.sleep(self.cassette.delay(entry["latency"]))
+            return StubResponse(entry["text"], entry.get("usage"))
+        start = time.perf_counter()
+        response = await self.inner.generate_content_async(parts, generation_config=generation_config,
+                                                           request_options=request_options)
+        self.cassette.record({"kind": "model", "key": key, "model": self.model_name, "text": response.text,
+                              "latency": time.perf_counter() - start, "usage": usage_of(response)})
+        return response
+
+
+def cassette_model_factory(cassette, inner_factory=None):
+    # Saat replay tidak perlu membuat model asli (tidak butuh API key)
+    if cassette.mode == REPLAY:
+        return lambda name: CassetteModel(name, None, cassette)
+    return lambda name: CassetteModel(name, inner_factory(name), cassette)
+
+
+class CassetteWorksheet:
+    def __init__(self, inner, cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def _call(self, op, payload, fn):
+        key = sheet_fingerprint(op, payload)
+        if self.cassette.mode == REPLAY:
+            entry = self.cassette.lookup(key)
+            time.sleep(self.cassette.delay(entry["latency"]))
+            return entry["response"]
+        start = time.perf_counter()
+        response = fn()
+        self.cassette.record({"kind": "sheet", "key": key, "op": op, "response": response,
+                              "latency": time.perf_counter() - start})
+        return response
+
+    def append_rows(self, values, **kwargs):
+        return self._call("append_rows", values, lambda: self.inner.append_rows(values, **kwargs))
+
+    def get_all_values(self):
+        return self._call("get_all_values", None, lambda: self.inner.get_all_values())
+
+    def batch_get(self, ranges):
+        return self._call("batch_get", ranges, lambda: [list(r) for r in self.inner.batch_get(ranges)])
+
+    def batch_update(self, data, **kwargs):
+        return self._call("batch_update", data, lambda: self.inner.batch_update(data, **kwargs))
+
+
+class CassetteSheetClient(LatencyLog):
+    def __init__(self, inner, cassette):
+        super().__init__()
+        self.inner = inner
+        self.cassette = cassette
+        self._sheet = None
+
+    def worksheet(self):
+        if self._sheet is None:
+            self._sheet = CassetteWorksheet(self.inner.worksheet() if self.inner else None, self.cassette)
+        return self._sheet
+
+    def reset(self):
+        if self.inner:
+            self.inner.reset()
+        self._sheet = None
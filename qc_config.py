@@ -0,0 +1,471 @@
+#============================KONFIGURASI MATERIAL================================================================================
+# Posisi kasar blok di checksheet (fraksi tinggi halaman, atas -> bawah), tanpa tumpang tindih.
+# Batas ini nanti di-snap ke garis tabel terdekat yang terdeteksi di foto. Tabel berakhir di garis bawah
+# baris last_row (baris mekanik terakhir yang dibaca), atau di garis bawah tabel kalau last_row None.
+def checksheet_layout(last_row=None):
+    return {
+        "header": {"span": (0.0, 0.30), "label": "BAGIAN HEADER (Ukuran, No. Batch, No. Surat Jalan, No. PO, Tanggal):"},
+        "table": {"span": (0.30, 1.0), "last_row": last_row, "label": "BAGIAN TABEL PENGUJIAN TEKNIS:"},
+    }
+
+CHECKSHEET_LAYOUT = checksheet_layout()
+
+# Field hasil scan (urutan sama dengan template JSON di prompt)
+FIELDS_BASE = ["tanggal", "nama_film", "ukuran", "lebar", "thickness", "no_surat_jalan", "no_po", "no_batch", "jml_datang"]
+FIELDS_SEAL = ["cof", "initial_seal_temp", "hasil_initial_seal"]
+FIELDS_MECH = ["tensile_md", "tensile_td", "elongation_md", "elongation_td", "modulus_md", "modulus_td"]
+FIELDS_TAIL = ["supplier", "sampling_size"]
+
+# Segmen ID nomor batch sama untuk semua material
+BATCH_ID_CODES = ["ADP", "RA", "SS", "EF", "SB", "DB"]
+
+MAT_CONFIG = {
+    "LLDPE": {
+        "prompt": """
+            Analisa checksheet LLDPE ini dengan sangat teliti. 
+            Fokus utama pada tabel pengujian teknis baris nomor 8, 9, dan 10.
+            
+            ATURAN EKSTRAKSI BARIS HASIL:
+            1. Row 8 (Tensile): Ambil nilai MD (atas) dan TD (bawah).
+            2. Row 9 (Elongation): Ambil nilai MD (atas) dan TD (bawah). Nilai bisa berupa '> 1400'.
+            3. Row 10 (Modulus Young): Ambil nilai MD (atas) dan TD (bawah) bernilai integer/tanpa koma.
+            
+            INSTRUKSI KHUSUS UKURAN:
+            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 75).
+            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+            Gunakan nilai dari baris 'Ukuran' di header saja
+            
+            INSTRUKSI KHUSUS NO BATCH:
+            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+            2. No. Batch hanya ada sebanyak 1 baris
+            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+            5. PENTING: Segmen IDS WAJIB salah satu dari: [SIA, BLF, NEW, PVT].
+            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/HLF/FZF', maka ekstrak sebagai '25C15/SB/25C15/BLF/FZF'.
+
+            INSTRUKSI KHUSUS NAMA FILM:
+            1. NAMA MATERIAL SELALU DIAWALI DENGAN "LLDPE". Jika tidak ada LLDPE, tambahkan "LLDPE" diawal nama
+            2. Setelah "LLDPE" harus selalu diikuti salah satu dari :
+            ["C4","C4 AST","C4 BAG","C4 ESS","C4 FZF","C4 KCK","C4 KMR","C4 PWD",
+            "C4 SNK","C4 STDG","C4 STDG POUCH","C4 STP","C4 WHITE","C4 WHITE STP","C8","C8 BAG",
+            "C8 BNH","C8 BRS","C8 EASY PEEL","C8 FZF","C8 KGK","C8 KKC","C8 KML","C8 KMR",
+            "C8 MBTL","C8 MURNI","C8 PSD","C8 PWD","C8 SP-LC","C8 STDG","C8 STP","C8 VACUUM",
+            "C8 VCM","C8 VKJ","C8+","EP","SCU(16)","SP(17)","SP(17)-WP","SP8N",
+            "SP-B","SP-F","SP-LC","SP-P","SP-WP"]
+
+            INSTRUKSI KHUSUS NO SURAT JALAN:
+            1. NO SURAT JALAN mempunyai 4 format. Pilih salah satu dari :["SJRBFI-XXXXXXXX", "SIA-XXXXXXXXX", "SPXXXXXXXX", "XXX/BJ/(angka romawi)/tahun"].
+
+            EKSTRAK KE JSON (tanpa ```json):
+            {
+            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
+            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
+            "modulus_md": "", "modulus_td": "",
+            "supplier": "Pilih: BLASFOLIE/SAKA/NUSA EKA/PANVERTA", "sampling_size": ""
+            }
+            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+            """, 
+        # Batas gambar yang dikirim ke AI (sisi terpanjang px, ukuran file byte)
+        "image_budget": {"max_side": 1600, "max_bytes": 450000},
+        "layout": checksheet_layout(last_row=10), # Tensile/Elongation/Modulus di baris 8-10
+        "fields": FIELDS_BASE + FIELDS_SEAL + FIELDS_MECH + FIELDS_TAIL,
+        # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+        "prompt_spec": {
+            "mech_rows": (8, 9, 10),
+            "surat_jalan": ["SJRBFI-XXXXXXXX", "SIA-XXXXXXXXX", "SPXXXXXXXX", "XXX/BJ/(angka romawi)/tahun"],
+            "batch_example": ("25C15/SB/25C15/HLF/FZF", "25C15/SB/25C15/BLF/FZF"),
+            "cof_pair": True,
+        },
+        # Daftar nilai yang valid, dipakai untuk response schema AI
+        "vocab": {
+            "film_prefix": "LLDPE",
+            "film_variants": ["C4","C4 AST","C4 BAG","C4 ESS","C4 FZF","C4 KCK","C4 KMR","C4 PWD",
+                              "C4 SNK","C4 STDG","C4 STDG POUCH","C4 STP","C4 WHITE","C4 WHITE STP","C8","C8 BAG",
+                              "C8 BNH","C8 BRS","C8 EASY PEEL","C8 FZF","C8 KGK","C8 KKC","C8 KML","C8 KMR",
+                              "C8 MBTL","C8 MURNI","C8 PSD","C8 PWD","C8 SP-LC","C8 STDG","C8 STP","C8 VACUUM",
+                              "C8 VCM","C8 VKJ","C8+","EP","SCU(16)","SP(17)","SP(17)-WP","SP8N",
+                              "SP-B","SP-F","SP-LC","SP-P","SP-WP"],
+            "thickness": None,
+            "suppliers": ["BLASFOLIE", "SAKA", "NUSA EKA", "PANVERTA"],
+            "batch_id": BATCH_ID_CODES,
+            "batch_ids": ["SIA", "BLF", "NEW", "PVT"],
+        },
+        "display_names": {
+            "tanggal": "Tanggal Checksheet",
+            "no_surat_jalan": "No Surat Jalan",
+            "no_po": "No PO",
+            "no_batch": "Nomor Batch",
+            "jml_datang": "Jumlah Datang",
+            "supplier": "Supplier",
+            "cof": "COF",
+            "initial_seal_temp": "Seal Temperature",
+            "hasil_initial_seal": "Nilai Seal",
+            "tensile_md": "Tensile MD",
+            "tensile_td": "Tensile TD",
+            "elongation_md": "Elongation MD",
+            "elongation_td": "Elongation TD",
+            "modulus_md": "Modulus MD",
+            "modulus_td": "Modulus TD"
+        }
+    },
+
+    "CPP": {
+        "prompt": """
+            Analisa checksheet CPP ini dengan sangat teliti. 
+            Fokus utama pada tabel pengujian teknis baris nomor 7, 8, dan 9.
+            
+            ATURAN EKSTRAKSI BARIS HASIL:
+            1. Row 7 (Tensile): Ambil nilai MD (atas) dan TD (bawah).
+            2. Row 8 (Elongation): Ambil nilai MD (atas) dan TD (bawah). Nilai bisa berupa '> 1400'.
+            3. Row 9 (Modulus Young): Ambil nilai MD (atas) dan TD (bawah) bernilai integer/tanpa koma.
+            
+            INSTRUKSI KHUSUS UKURAN:
+            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 25).
+            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+            Gunakan nilai dari baris 'Ukuran' di header saja
+            
+            INSTRUKSI KHUSUS NO BATCH:
+            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+            2. No. Batch hanya ada sebanyak 1 baris
+            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+            5. PENTING: Segmen IDS WAJIB salah satu dari: [PSAJ, IPM, PVT].
+            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/1PM/FZF', maka ekstrak sebagai '25C15/SB/25C15/IPM/FZF'.
+
+            INSTRUKSI KHUSUS NAMA FILM:
+            1. NAMA MATERIAL SELALU DIAWALI DENGAN "CPP". Jika tidak ada CPP, tambahkan "CPP " diawal nama
+            2. Setelah "CPP" harus selalu diikuti salah satu dari :
+            ['CHS-HD', 'CHS-K', 'CHS-V', 'CHS-V2', 'PJZL-20', 'HHK08', 'HHK-08', 'HHK']
+
+            INSTRUKSI KHUSUS NO SURAT JALAN:
+            1. NO SURAT JALAN mempunyai format salah satu dari : ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"].
+
+            EKSTRAK KE JSON (tanpa ```json):
+            {
+            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
+            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
+            "modulus_md": "", "modulus_td": "",
+            "supplier": "Pilih: INDONESIA PRATAMA/PERDANA SETIA ABADI/PANVERTA", "sampling_size": ""
+            }
+            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+            """, 
+        "image_budget": {"max_side": 1600, "max_bytes": 450000},
+        "layout": checksheet_layout(last_row=9), # Tensile/Elongation/Modulus di baris 7-9
+        "fields": FIELDS_BASE + FIELDS_SEAL + FIELDS_MECH + FIELDS_TAIL,
+        # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+        "prompt_spec": {
+            "mech_rows": (7, 8, 9),
+            "surat_jalan": ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"],
+            "batch_example": ("25C15/SB/25C15/1PM/FZF", "25C15/SB/25C15/IPM/FZF"),
+            "cof_pair": True,
+        },
+        "vocab": {
+            "film_prefix": "CPP",
+            "film_variants": ["CHS-HD", "CHS-K", "CHS-V", "CHS-V2", "PJZL-20", "HHK08", "HHK-08", "HHK"],
+            "thickness": None,
+            "suppliers": ["INDONESIA PRATAMA", "PERDANA SETIA ABADI", "PANVERTA"],
+            "batch_id": BATCH_ID_CODES,
+            "batch_ids": ["PSAJ", "IPM", "PVT"],
+        },
+        "display_names": {
+            "tanggal": "Tanggal Checksheet",
+            "no_surat_jalan": "No Surat Jalan",
+            "no_po": "No PO",
+            "no_batch": "Nomor Batch",
+            "jml_datang": "Jumlah Datang",
+            "supplier": "Supplier",
+            "cof": "COF",
+            "initial_seal_temp": "Seal Temperature",
+            "hasil_initial_seal": "Nilai Seal",
+            "tensile_md": "Tensile MD",
+            "tensile_td": "Tensile TD",
+            "elongation_md": "Elongation MD",
+            "elongation_td": "Elongation TD",
+            "modulus_md": "Modulus MD",
+            "modulus_td": "Modulus TD"
+        }
+    },
+
+    "VMCPP": {
+        "prompt": """
+            Analisa checksheet VMCPP ini dengan sangat teliti. 
+            
+            INSTRUKSI KHUSUS UKURAN:
+            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (Contoh: 25).
+            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+            Gunakan nilai dari baris 'Ukuran' di header saja
+            
+            INSTRUKSI KHUSUS NO BATCH:
+            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+            2. No. Batch hanya ada sebanyak 1 baris
+            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+            5. PENTING: Segmen IDS WAJIB salah satu dari: [PSAJ, IPM, PVT].
+            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/1PM/FZF', maka ekstrak sebagai '25C15/SB/25C15/IPM/FZF'.
+
+            INSTRUKSI KHUSUS NAMA FILM:
+            1. NAMA MATERIAL SELALU DIAWALI DENGAN "VMCPP". Jika tidak ada VMCPP, tambahkan "VMCPP " diawal nama
+            2. Setelah "CPP" harus selalu diikuti salah satu dari :
+            ['CMS-W3', 'CMS-VUB', 'MGAA', 'MGAB', 'KHMMHB', 'KKHMMHBST']
+
+            INSTRUKSI KHUSUS NO SURAT JALAN:
+            1. NO SURAT JALAN mempunyai format salah satu dari : ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"].
+
+            EKSTRAK KE JSON (tanpa ```json):
+            {
+            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+            "cof": "0,XX / 0,XX", "initial_seal_temp": "", "hasil_initial_seal": "", 
+            "tensile_md": "", "tensile_td": "", "elongation_md": "", "elongation_td": "", 
+            "modulus_md": "", "modulus_td": "",
+            "supplier": "Pilih: INDONESIA PRATAMA/PERDANA SETIA ABADI/PANVERTA", "sampling_size": ""
+            }
+            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+            """, 
+        "image_budget": {"max_side": 1600, "max_bytes": 350000},
+        "layout": CHECKSHEET_LAYOUT,
+        "fields": FIELDS_BASE + FIELDS_SEAL + FIELDS_MECH + ["bonding_metalize"] + FIELDS_TAIL,
+        # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+        "prompt_spec": {
+            "mech_rows": None,
+            "surat_jalan": ["XXX/BJ/(angka romawi)/tahun", "XXXXX", "X/XXXX/(MM)/(YY)"],
+            "batch_example": ("25C15/SB/25C15/1PM/FZF", "25C15/SB/25C15/IPM/FZF"),
+            "cof_pair": True,
+        },
+        "vocab": {
+            "film_prefix": "VMCPP",
+            "film_variants": ["CMS-W3", "CMS-VUB", "MGAA", "MGAB", "KHMMHB", "KKHMMHBST"],
+            "thickness": None,
+            "suppliers": ["INDONESIA PRATAMA", "PERDANA SETIA ABADI", "PANVERTA"],
+            "batch_id": BATCH_ID_CODES,
+            "batch_ids": ["PSAJ", "IPM", "PVT"],
+        },
+        "display_names": {
+            "tanggal": "Tanggal Checksheet",
+            "no_surat_jalan": "No Surat Jalan",
+            "no_po": "No PO",
+            "no_batch": "Nomor Batch",
+            "jml_datang": "Jumlah Datang",
+            "supplier": "Supplier",
+            "cof": "COF",
+            "initial_seal_temp": "Seal Temperature",
+            "hasil_initial_seal": "Nilai Seal",
+            "bonding_metalize": "Bonding Metalize",
+        }
+    },
+
+
+
+    "PET": {
+        "prompt": """
+            Analisa checksheet PET ini dengan sangat teliti. 
+            
+            INSTRUKSI KHUSUS UKURAN:
+            1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+            2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+            3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [9, 11, 12]).
+            4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+            Gunakan nilai dari baris 'Ukuran' di header saja
+            
+            INSTRUKSI KHUSUS NO BATCH:
+            1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+            2. No. Batch hanya ada sebanyak 1 baris
+            3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+            4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+            5. PENTING: Segmen IDS WAJIB salah satu dari: [AKPI, IDP, CFI, TRST, IMS].
+            6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+            7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
+
+            INSTRUKSI KHUSUS NAMA FILM:
+            1. NAMA MATERIAL SELALU DIAWALI DENGAN "PET". Jika tidak ada PET, tambahkan "PET " diawal nama
+            2. Setelah "PET" harus selalu diikuti salah satu dari :
+            ["IF", "EP", "TF", "PL"]  dan diikuti oleh thickness. Contoh "PET IF-9" atau "PET EP-12"
+
+            INSTRUKSI KHUSUS NO SURAT JALAN:
+            1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)","FXXXXXXXX", "XXXXXXXX"].
+
+
+            EKSTRAK KE JSON (tanpa ```json):
+            {
+            "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+            "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+            "cof": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS/ARGHA KARYA/COLORPAK/INTI MAKMUR SEJATI", "sampling_size": ""
+            }
+            Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+            """, 
+        "image_budget": {"max_side": 1600, "max_bytes": 300000},
+        "layout": CHECKSHEET_LAYOUT,
+        "fields": FIELDS_BASE + ["cof"] + FIELDS_TAIL,
+        # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+        "prompt_spec": {
+            "mech_rows": None,
+            "surat_jalan": ["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)", "FXXXXXXXX", "XXXXXXXX"],
+            "batch_example": ("25C15/SB/25C15/TR51/FZF", "25C15/SB/25C15/TRST/FZF"),
+            "cof_pair": False,
+        },
+        "vocab": {
+            "film_prefix": "PET",
+            "film_variants": ["IF", "EP", "TF", "PL"],
+            "thickness": ["9", "11", "12"],
+            "suppliers": ["INDOPOLY", "TRIAS", "ARGHA KARYA", "COLORPAK", "INTI MAKMUR SEJATI"],
+            "batch_id": BATCH_ID_CODES,
+            "batch_ids": ["AKPI", "IDP", "CFI", "TRST", "IMS"],
+        },
+        "display_names": {
+            "tanggal": "Tanggal Checksheet",
+            "no_surat_jalan": "No Surat Jalan",
+            "no_po": "No PO",
+            "no_batch": "Nomor Batch",
+            "jml_datang": "Jumlah Datang",
+            "supplier": "Supplier",
+            "cof": "COF",
+        }
+    },
+
+        "VMPET": {
+            "prompt": """
+                Analisa checksheet VMPET ini dengan sangat teliti. 
+                
+                INSTRUKSI KHUSUS UKURAN:
+                1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+                2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+                3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [9, 12]).
+                4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+                Gunakan nilai dari baris 'Ukuran' di header saja
+                
+                INSTRUKSI KHUSUS NO BATCH:
+                1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+                2. No. Batch hanya ada sebanyak 1 baris
+                3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+                4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+                5. PENTING: Segmen IDS WAJIB salah satu dari: [IDP,TRST].
+                6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+                7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
+
+                INSTRUKSI KHUSUS NAMA FILM:
+                1. NAMA MATERIAL SELALU DIAWALI DENGAN "VMPET". Jika tidak ada VMPET, tambahkan "VMPET " diawal nama
+                2. Setelah "VMPET" harus selalu diikuti salah satu dari :
+                ["IMM", "IMN", "IMS","KZMB"] dan diikuti oleh thickness. Contoh "VMPET IMN-12"
+
+                INSTRUKSI KHUSUS NO SURAT JALAN:
+                1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "XXXXXXXX"].
+
+
+                EKSTRAK KE JSON (tanpa ```json):
+                {
+                "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+                "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+                "bonding_metalize": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS", "sampling_size": ""
+                }
+                Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+                """, 
+            "image_budget": {"max_side": 1600, "max_bytes": 300000},
+            "layout": CHECKSHEET_LAYOUT,
+            "fields": FIELDS_BASE + ["bonding_metalize"] + FIELDS_TAIL,
+            # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+            "prompt_spec": {
+                "mech_rows": None,
+                "surat_jalan": ["SJXXXXXXXX-CR", "XXXXXXXX"],
+                "batch_example": ("25C15/SB/25C15/TR51/FZF", "25C15/SB/25C15/TRST/FZF"),
+                "cof_pair": False,
+            },
+            "vocab": {
+                "film_prefix": "VMPET",
+                "film_variants": ["IMM", "IMN", "IMS", "KZMB"],
+                "thickness": ["9", "12"],
+                "suppliers": ["INDOPOLY", "TRIAS"],
+                "batch_id": BATCH_ID_CODES,
+                "batch_ids": ["IDP", "TRST"],
+            },
+            "display_names": {
+                "tanggal": "Tanggal Checksheet",
+                "no_surat_jalan": "No Surat Jalan",
+                "no_po": "No PO",
+                "no_batch": "Nomor Batch",
+                "jml_datang": "Jumlah Datang",
+                "supplier": "Supplier",
+                "bonding_metalize": "Bonding Metalize",
+            }
+        },
+
+        "OPP": {
+            "prompt": """
+                Analisa checksheet OPP ini dengan sangat teliti. 
+                
+                INSTRUKSI KHUSUS UKURAN:
+                1. Cari baris bertuliskan 'Ukuran' di bagian atas (Header).
+                2. Ambil angka sebelum 'mm' sebagai 'lebar' (Contoh: 790).
+                3. Ambil angka sebelum 'um' atau 'u' sebagai 'thickness' (hanya ada angka [18, 20, 21]).
+                4. JANGAN mengambil angka dari tabel 'Hasil' baris nomor 2 (lebar film) dan nomor 3 (ketebalan). 
+                Gunakan nilai dari baris 'Ukuran' di header saja
+                
+                INSTRUKSI KHUSUS NO BATCH:
+                1. Cari baris bertuliskan 'No. Batch (INTERNAL)' dibagian atas (Header).
+                2. No. Batch hanya ada sebanyak 1 baris
+                3. Nomor batch memiliki format: XXXXX/(ID)/XXXXX/(IDS)
+                4. PENTING: Segmen ID WAJIB salah satu dari: [ADP, RA, SS, EF, SB, DB].
+                5. PENTING: Segmen IDS WAJIB salah satu dari: [AKPI, IDP, CFI, TRST, IMS].
+                6. PENTING: Jika ada segmen tambahan setelah IDS (contoh: /FZF, /PROD, /XYZ), JANGAN DIHAPUS. Ekstrak seluruh rangkaian karakter tersebut secara utuh.
+                7. Contoh jika di dokumen tertulis '25C15/SB/25C15/TR51/FZF', maka ekstrak sebagai '25C15/SB/25C15/TRST/FZF'.
+
+                INSTRUKSI KHUSUS NAMA FILM:
+                1. NAMA MATERIAL SELALU DIAWALI DENGAN "OPP". Jika tidak ada OPP, tambahkan "OPP " diawal nama
+                2. Setelah "OPP" harus selalu diikuti salah satu dari :
+                ["SF", "MF", "SW", "STT", "PF", "PLE", "PCI"] dan diikuti oleh thickness. Contoh "OPP SF-18" atau "OPP STT-20"
+
+                INSTRUKSI KHUSUS NO SURAT JALAN:
+                1. NO SURAT JALAN mempunyai format salah satu dari :["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)","FXXXXXXXX", "XXXXXXXX"].
+
+
+                EKSTRAK KE JSON (tanpa ```json):
+                {
+                "tanggal": "dd-mm-yyyy", "nama_film" : "", "ukuran": "xx μm x XXX mm", "lebar":"","thickness":"",
+                "no_surat_jalan": "", "no_po": "PO-XX-XXXXXX", "no_batch": "", "jml_datang": "(format hanya angka bulat)",
+                "cof": "0,XX", "supplier": "Pilih: INDOPOLY/TRIAS/ARGHA KARYA/COLORPAK/INTI MAKMUR SEJATI", "sampling_size": ""
+                }
+                Gunakan titik (.) untuk desimal. Jangan menebak jika tulisan tidak terlihat, kosongkan saja.
+                """, 
+            "image_budget": {"max_side": 1600, "max_bytes": 300000},
+            "layout": CHECKSHEET_LAYOUT,
+            "fields": FIELDS_BASE + ["cof"] + FIELDS_TAIL,
+            # Bahan prompt yang dikompilasi (qc_prompt): baris tabel mekanik, format surat jalan, contoh koreksi batch
+            "prompt_spec": {
+                "mech_rows": None,
+                "surat_jalan": ["SJXXXXXXXX-CR", "IMS-MAT-DN-(TAHUN)-XXXX", "XXXXX/XXXX/(YYMM)", "FXXXXXXXX", "XXXXXXXX"],
+                "batch_example": ("25C15/SB/25C15/TR51/FZF", "25C15/SB/25C15/TRST/FZF"),
+                "cof_pair": False,
+            },
+            "vocab": {
+                "film_prefix": "OPP",
+                "film_variants": ["SF", "MF", "SW", "STT", "PF", "PLE", "PCI"],
+                "thickness": ["18", "20", "21"],
+                "suppliers": ["INDOPOLY", "TRIAS", "ARGHA KARYA", "COLORPAK", "INTI MAKMUR SEJATI"],
+                "batch_id": BATCH_ID_CODES,
+                "batch_ids": ["AKPI", "IDP", "CFI", "TRST", "IMS"],
+            },
+            "display_names": {
+                "tanggal": "Tanggal Checksheet",
+                "no_surat_jalan": "No Surat Jalan",
+                "no_po": "No PO",
+                "no_batch": "Nomor Batch",
+                "jml_datang": "Jumlah Datang",
+                "supplier": "Supplier",
+                "cof": "COF",
+            }
+        }
+}
+
+#===================================================================================================================
@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import threading
+import time
+
+import google.generativeai as genai
+from google.api_core import exceptions as gexc
+
+from qc_cache import prompt_version
+
+# --- CONTEXT CACHE UNTUK PREFIX PROMPT STATIS ---
+# Prompt tiap material (bagian pertama request) didaftarkan sekali sebagai cached content dengan TTL,
+# jadi tiap scan cukup mengirim gambar. Cache diperpanjang otomatis saat dipakai menjelang kedaluwarsa;
+# material yang lama tidak dipakai dibiarkan kedaluwarsa (cache di Gemini juga ditagih per jam penyimpanan).
+# Prefix di bawah min_tokens backend (batas minimum cached content Gemini) tetap dikirim inline.
+# Prompt compiled sekarang masih ~200-240 token (jauh di bawah 1024), jadi di app defaultnya mati
+# (QC_CONTEXT_CACHE=1 untuk menyalakan); prefix yang pasti terlalu pendek tidak dihitung lewat API.
+CACHE_GONE = (gexc.NotFound, gexc.PermissionDenied, LookupError)
+
+
+class GeminiContextBackend:
+    min_tokens = 1024 # Minimum token cached content untuk model Gemini 2.5 Flash
+
+    def count_tokens(self, model_name, text):
+        return genai.GenerativeModel(model_name).count_tokens(text).total_tokens
+
+    def create(self, model_name, text, ttl):
+        return genai.caching.CachedContent.create(
+            model=model_name, contents=[text], ttl=datetime.timedelta(seconds=ttl)
+        )
+
+    def refresh(self, handle, ttl):
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def delete(self, handle):
+        handle.delete()
+
+    def bind(self, handle):
+        return genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+
+class ContextCache:
+    def __init__(self, backend, ttl=3600, refresh_before=300, retry_after=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_before = refresh_before
+        self.retry_after = retry_after # Jeda sebelum mencoba buat cache lagi setelah gagal
+        self.counts = {"created": 0, "refreshed": 0, "hits": 0, "inline": 0, "errors": 0}
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _create(self, key, model_name, prefix):
+        handle = self.backend.create(model_name, prefix, self.ttl)
+        entry = {"handle": handle, "model": self.backend.bind(handle), "expire": time.time() + self.ttl}
+        self._entries[key] = entry
+        self._count("created")
+        return entry
+
+    def model_for(self, model_name, prefix):
+        # Model yang terikat ke cached content untuk prefix ini, atau None kalau harus dikirim inline
+        key = (model_name, prompt_version(prefix))
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry and "handle" not in entry and entry["inline_until"] > now:
+                self._count("inline")
+                return None
+            try:
+                # Satu token minimal satu karakter: prefix lebih pendek dari min_tokens karakter pasti tidak lolos,
+                # tidak perlu round trip count_tokens
+                if entry is None and (len(prefix) < self.backend.min_tokens or
+                                      self.backend.count_tokens(model_name, prefix) < self.backend.min_tokens):
+                    # Terlalu pendek untuk cached content: jangan dicek lagi selama proses ini jalan
+                    self._entries[key] = {"inline_until": float("inf")}
+                    self._count("inline")
+                    return None
+                if entry is None or "handle" not in entry or entry["expire"] <= now:
+                    entry = self._create(key, model_name, prefix)
+                elif entry["expire"] - now < self.refresh_before:
+                    self.backend.refresh(entry["handle"], self.ttl)
+                    entry["expire"] = now + self.ttl
+                    self._count("refreshed")
+            except Exception:
+                self._entries[key] = {"inline_until": now + self.retry_after}
+                self._count("errors")
+                return None
+            self._count("hits")
+            return entry["model"]
+
+    def stats(self):
+        with self._lock:
+            active = sum(1 for e in self._entries.values() if "handle" in e and e["expire"] > time.time())
+            return dict(self.counts, active=active)
+
+    def invalidate(self, model_name, prefix):
+        with self._lock:
+            self._entries.pop((model_name, prompt_version(prefix)), None)
+
+
+class ContextCachedModel:
+    # Pembungkus model: bagian pertama request (prompt teks) diganti cached content kalau tersedia
+    def __init__(self, model_name, inner, cache):
+        self.model_name = model_name
+        self.inner = inner
+        self.cache = cache
+
+    def _split(self, parts):
+        if parts and isinstance(parts[0], str):
+            return parts[0], list(parts[1:])
+        return None, list(parts)
+
+    def generate_content(self, parts, generation_config=None, stream=False, request_options=None):
+        prefix, rest = self._split(parts)
+        model = self.cache.model_for(self.model_name, prefix) if prefix else None
+        if model is not None:
+            try:
+                return model.generate_content(rest, generation_config=generation_config, stream=stream,
+                                              request_options=request_options)
+            except CACHE_GONE:
+                # Cache dihapus/kedaluwarsa di server: daftar ulang di scan berikutnya, scan ini kirim inline
+                self.cache.invalidate(self.model_name, prefix)
+        return self.inner.generate_content(parts, generation_config=generation_config, stream=stream,
+                                           request_options=request_options)
+
+    async def generate_content_async(self, parts, generation_config=None, request_options=None):
+        prefix, rest = self._split(parts)
+        # Membuat/memperpanjang cache adalah panggilan jaringan: jangan blokir event loop engine
+        model = await asyncio.to_thread(self.cache.model_for, self.model_name, prefix) if prefix else None
+        if model is not None:
+            try:
+                return await model.generate_content_async(rest, generation_config=generation_config,
+                                                          request_options=request_options)
+            except CACHE_GONE:
+                self.cache.invalidate(self.model_name, prefix)
+        return await self.inner.generate_content_async(parts, generation_config=generation_config,
+                                                       request_options=request_options)
+
+
+def context_cached_factory(cache, inner_factory):
+    return lambda name: ContextCachedModel(name, inner_factory(name), cache)
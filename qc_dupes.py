@@ -0,0 +1,190 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from qc_sheets import read_ranges
+
+# --- INDEX KEY UNTUK DETEKSI SCAN DOBEL ---
+# Key (no_batch) dan (no_surat_jalan, no_po) dari semua baris sheet disimpan di SQLite lokal + dict di memori,
+# jadi form verifikasi bisa cek duplikat tanpa get_all_values(). Sync dari sheet incremental: hanya baris
+# setelah baris terakhir yang sudah dibaca (kolom D:F, satu batchGet per chunk). Baris yang baru dikirim
+# langsung masuk sebagai key 'lokal' (masih di antrian), lalu dicocokkan saat baris itu terbaca dari sheet.
+DEFAULT_INDEX_PATH = os.path.join(".qc_cache", "key_index.sqlite")
+
+# Kolom sheet sesuai build_sheet_row: D = no_surat_jalan, E = no_po, F = no_batch
+SHEET_RANGE = ("D", "F")
+SHEET_FIELDS = ("no_surat_jalan", "no_po", "no_batch")
+FIRST_ROW = 2 # Baris 1 = header
+
+# no_batch unik per roll: duplikat = hampir pasti scan dobel. Satu surat jalan + PO bisa berisi
+# beberapa batch, jadi key ini hanya sebagai info.
+DUP_KEYS = {
+    "no_batch": ("no_batch",),
+    "surat_jalan_po": ("no_surat_jalan", "no_po"),
+}
+BLOCKING_KEYS = ("no_batch",)
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+
+def _norm(value):
+    # '25A10/HHK08/0001' dan '25a10-hhk08 0001' dianggap sama
+    return _NON_ALNUM.sub("", str(value or "").upper())
+
+
+def row_keys(values):
+    # values: dict field -> nilai; key dengan salah satu field kosong dilewati
+    keys = []
+    for kind, fields in DUP_KEYS.items():
+        parts = [_norm(values.get(f)) for f in fields]
+        if all(parts):
+            keys.append((kind, "|".join(parts)))
+    return keys
+
+
+class KeyIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.last_error = None
+        self.last_sync = None
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_keys ("
+            " kind TEXT NOT NULL, value TEXT NOT NULL, count INTEGER NOT NULL, first_row INTEGER,"
+            " PRIMARY KEY (kind, value))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS local_keys ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, job_id INTEGER, kind TEXT NOT NULL, value TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.commit()
+        self._load()
+
+    def _load(self):
+        self._sheet = {(k, v): [c, r] for k, v, c, r in
+                       self._db.execute("SELECT kind, value, count, first_row FROM sheet_keys")}
+        self._local = {}
+        for rid, job_id, k, v in self._db.execute("SELECT id, job_id, kind, value FROM local_keys ORDER BY id"):
+            self._local.setdefault((k, v), []).append((rid, job_id))
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'synced_row'").fetchone()
+        self.synced_row = row[0] if row else FIRST_ROW - 1
+
+    def lookup(self, values):
+        # Return list duplikat: {kind, value, count (baris di sheet), first_row, pending (job antrian)}
+        found = []
+        with self._lock:
+            for key in row_keys(values):
+                count, first_row = self._sheet.get(key, (0, None))
+                pending = [job_id for _, job_id in self._local.get(key, ())]
+                if count or pending:
+                    found.append({"kind": key[0], "value": key[1], "count": count,
+                                  "first_row": first_row, "pending": pending})
+        return found
+
+    def add(self, values, job_id=None):
+        # Dipanggil setelah baris masuk antrian kirim
+        now = time.time()
+        with self._lock:
+            for key in row_keys(values):
+                cur = self._db.execute(
+                    "INSERT INTO local_keys (job_id, kind, value, created) VALUES (?, ?, ?, ?)",
+                    (job_id, key[0], key[1], now),
+                )
+                self._local.setdefault(key, []).append((cur.lastrowid, job_id))
+            self._db.commit()
+
+    def _add_sheet_row(self, row_num, values):
+        for key in row_keys(values):
+            local = self._local.get(key)
+            if local:
+                # Baris kiriman sendiri sudah sampai di sheet: pindahkan dari lokal ke sheet
+                rid, _ = local.pop(0)
+                if not local:
+                    del self._local[key]
+                self._db.execute("DELETE FROM local_keys WHERE id = ?", (rid,))
+            entry = self._sheet.get(key)
+            if entry is None:
+                entry = self._sheet[key] = [0, row_num]
+            entry[0] += 1
+            self._db.execute(
+                "INSERT INTO sheet_keys (kind, value, count, first_row) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(kind, value) DO UPDATE SET count = excluded.count",
+                (key[0], key[1], entry[0], entry[1]),
+            )
+
+    def sync(self, sheet, chunk=1000):
+        # Baca baris baru saja (setelah synced_row); return jumlah baris yang dibaca
+        total = 0
+        while True:
+            start = self.synced_row + 1
+            end = start + chunk - 1
+            block = read_ranges(sheet, [f"{SHEET_RANGE[0]}{start}:{SHEET_RANGE[1]}{end}"])[0]
+            if not block:
+                break
+            with self._lock:
+                for i, cells in enumerate(block):
+                    self._add_sheet_row(start + i, dict(zip(SHEET_FIELDS, cells)))
+                # Baris kosong di akhir range tidak dikembalikan API: watermark = baris terisi terakhir
+                self.synced_row = start + len(block) - 1
+                self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('synced_row', ?)",
+                                 (self.synced_row,))
+                self._db.commit()
+            total += len(block)
+            if len(block) < chunk:
+                break
+        self.last_sync = time.time()
+        return total
+
+    def reset(self):
+        # Dipakai kalau baris di sheet dihapus/diedit manual: sync berikutnya membaca ulang dari awal
+        with self._lock:
+            self._db.execute("DELETE FROM sheet_keys")
+            self._db.execute("DELETE FROM meta")
+            self._db.commit()
+            self._sheet = {}
+            self.synced_row = FIRST_ROW - 1
+
+    def stats(self):
+        with self._lock:
+            return {"keys": len(self._sheet), "pending": sum(len(v) for v in self._local.values()),
+                    "synced_row": self.synced_row, "last_sync": self.last_sync}
+
+
+class KeySyncer:
+    # Thread background yang menyamakan index dengan sheet tiap interval detik
+    def __init__(self, index, sheet_client, interval=60.0):
+        self.index = index
+        self.sheet_client = sheet_client
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="key-sync", daemon=True)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.index.sync(self.sheet_client.worksheet())
+                self.index.last_error = None
+            except Exception as e:
+                self.index.last_error = str(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
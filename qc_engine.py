@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+
+# --- ENGINE EKSTRAKSI ASYNCIO (SATU EVENT LOOP UNTUK SEMUA SESSION) ---
+# Semua session Streamlit mengirim request AI ke satu event loop di thread terpisah.
+# Menunggu respons jaringan tidak lagi memakan satu thread per request, jadi satu proses server
+# bisa menjalankan banyak ekstraksi sekaligus; jumlah yang jalan bersamaan dibatasi semaphore.
+class ExtractionEngine:
+    def __init__(self, caller, max_in_flight=16):
+        self.caller = caller
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="extraction-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._sem = asyncio.Semaphore(self.max_in_flight)
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _call(self, parts, generation_config):
+        async with self._sem:
+            self.in_flight += 1
+            try:
+                return await self.caller.agenerate(parts, generation_config=generation_config)
+            finally:
+                self.in_flight -= 1
+
+    # Bisa dipanggil dari thread mana saja; hasilnya concurrent.futures.Future
+    def submit(self, parts, generation_config=None):
+        return asyncio.run_coroutine_threadsafe(self._call(parts, generation_config), self.loop)
+
+    # Slot untuk panggilan sinkron di luar engine (streaming di thread script): ikut dibatasi semaphore
+    # yang sama, jadi max_in_flight berlaku untuk semua panggilan AI. Counter hanya diubah di thread event loop.
+    async def _acquire(self):
+        await self._sem.acquire()
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._sem.release()
+
+    @contextmanager
+    def slot(self):
+        asyncio.run_coroutine_threadsafe(self._acquire(), self.loop).result()
+        try:
+            yield
+        finally:
+            self.loop.call_soon_threadsafe(self._release)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,333 @@
+import io
+import math
+
+import numpy as np
+from PIL import Image, ImageOps, JpegImagePlugin
+
+# --- PREPROCESSING GAMBAR SEBELUM DIKIRIM KE AI ---
+# Urutan: EXIF orientation -> resize -> grayscale (kalau aman) -> kontras -> encode sesuai budget byte.
+# Hasilnya byte JPEG/WebP yang ukurannya bisa ditebak, bukan tergantung encoder SDK.
+DEFAULT_BUDGET = {"max_side": 1600, "max_bytes": 400000}
+GRAY_SATURATION = 40   # Piksel dengan saturasi di atas ini dianggap "berwarna"
+GRAY_MAX_COLOR = 0.02  # Grayscale hanya kalau piksel berwarna < 2% (tinta/stempel berwarna tetap aman)
+MIN_QUALITY = 40
+MIME = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def _draft(img, max_side):
+    # JPEG: decoder langsung menghasilkan skala 1/2, 1/4 atau 1/8 (DCT scaling) selama hasilnya masih
+    # >= max_side, jadi foto 12 MP tidak pernah ada di RAM dalam resolusi penuh.
+    # thumbnail() sendiri baru memakai draft kalau gambar >= 4x target (reducing_gap), terlalu jarang untuk foto HP.
+    # isinstance, bukan img.format == "JPEG": foto HP yang tersimpan sebagai MPO (format "MPO") juga JPEG.
+    if isinstance(img, JpegImagePlugin.JpegImageFile) and max(img.size) > max_side:
+        f = max_side / max(img.size)
+        img.draft(None, (math.ceil(img.width * f), math.ceil(img.height * f)))
+
+
+def load_image(source, max_side=None):
+    # max_side=None -> decode resolusi penuh. Dengan max_side hasilnya antara max_side dan 2x max_side
+    # (tidak di-resize lagi: preprocessing / crop ROI tetap mengecilkan ke budget masing-masing)
+    img = Image.open(source)
+    if max_side:
+        _draft(img, max_side)
+    # Foto HP sering tersimpan miring dengan tag EXIF Orientation, tegakkan dulu
+    return ImageOps.exif_transpose(img)
+
+
+def load_reduced(source, max_side):
+    # Ukuran pas max_side (preview / deteksi orientasi)
+    img = Image.open(source)
+    _draft(img, max_side)
+    img.thumbnail((max_side, max_side))
+    return ImageOps.exif_transpose(img)
+
+
+def encode_preview(img, quality=80):
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def is_grayscale_safe(img):
+    if img.mode in ("L", "1"):
+        return True
+    sample = img.convert("RGB")
+    sample.thumbnail((256, 256))
+    sat = sample.convert("HSV").getchannel("S")
+    hist = sat.histogram()
+    colored = sum(hist[GRAY_SATURATION:])
+    return colored / max(1, sum(hist)) < GRAY_MAX_COLOR
+
+
+def _encode(img, fmt, quality):
+    buf = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(buf, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+
+def preprocess_image(img, budget=None, fmt="JPEG", grayscale=True, contrast=True):
+    budget = {**DEFAULT_BUDGET, **(budget or {})}
+    img = ImageOps.exif_transpose(img)
+    img = img.copy()
+    img.thumbnail((budget["max_side"], budget["max_side"]))
+
+    if grayscale and is_grayscale_safe(img):
+        img = img.convert("L")
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    if contrast:
+        # Buang 1% piksel paling gelap/terang supaya kertas jadi putih dan tulisan lebih tegas
+        img = ImageOps.autocontrast(img, cutoff=1)
+
+    # Turunkan quality dulu, kalau masih kebesaran baru kecilkan resolusi
+    quality = 85
+    data = _encode(img, fmt, quality)
+    while len(data) > budget["max_bytes"]:
+        if quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - 10)
+        else:
+            img = img.resize((int(img.width * 0.85), int(img.height * 0.85)), Image.LANCZOS)
+        data = _encode(img, fmt, quality)
+
+    return {
+        "mime_type": MIME[fmt],
+        "data": data,
+        "width": img.width,
+        "height": img.height,
+        "mode": img.mode,
+        "quality": quality,
+    }
+
+
+def as_part(prepared):
+    # Format blob yang diterima google.generativeai.generate_content
+    return {"mime_type": prepared["mime_type"], "data": prepared["data"]}
+
+
+# --- CROP REGION OF INTEREST (HEADER + TABEL PENGUJIAN) ---
+# Yang dikirim ke AI cukup blok header dan tabel teknis, masing-masing sebagai gambar terpisah.
+# Karena crop lebih kecil dari satu halaman, dengan max_side yang sama resolusi efektifnya naik, tapi total
+# piksel semua crop dibatasi sama dengan satu halaman penuh di budget yang sama (token gambar tidak boleh naik).
+ANALYSIS_SIDE = 1200    # Resolusi kerja untuk deteksi layout (cukup untuk cari garis tabel)
+LINE_MIN_FILL = 0.5     # Baris piksel dianggap garis tabel kalau >50% lebar konten berisi tinta
+SNAP_TOLERANCE = 0.08   # Batas layout hanya di-snap ke garis yang jaraknya < 8% tinggi konten
+REGION_PAD = 0.01
+TABLE_TITLE_ROWS = 1    # Baris judul kolom di atas baris nomor 1 tabel pengujian
+
+
+def _otsu(gray):
+    hist = np.bincount(gray.ravel(), minlength=256).astype(float)
+    total = gray.size
+    cum = np.cumsum(hist)
+    cum_mean = np.cumsum(hist * np.arange(256))
+    w0 = cum / total
+    w1 = 1 - w0
+    valid = (w0 > 0) & (w1 > 0)
+    mu0 = np.where(valid, cum_mean / np.maximum(cum, 1), 0)
+    mu1 = np.where(valid, (cum_mean[-1] - cum_mean) / np.maximum(total - cum, 1), 0)
+    between = np.where(valid, w0 * w1 * (mu0 - mu1) ** 2, 0)
+    return int(np.argmax(between))
+
+
+def _ink_mask(img):
+    small = img.convert("L")
+    small.thumbnail((ANALYSIS_SIDE, ANALYSIS_SIDE))
+    gray = np.asarray(small)
+    return gray < _otsu(gray), small.size
+
+
+def _content_bbox(ink):
+    # Baris/kolom yang hampir penuh "tinta" adalah latar belakang gelap di luar kertas
+    row_fill, col_fill = ink.mean(axis=1), ink.mean(axis=0)
+    rows = np.flatnonzero((row_fill > 0.01) & (row_fill < 0.9))
+    cols = np.flatnonzero((col_fill > 0.01) & (col_fill < 0.9))
+    if rows.size == 0 or cols.size == 0:
+        return None
+    return cols[0], rows[0], cols[-1] + 1, rows[-1] + 1
+
+
+def _horizontal_lines(ink, bbox):
+    x0, y0, x1, y1 = bbox
+    fill = ink[y0:y1, x0:x1].mean(axis=1)
+    # Foto sedikit miring membuat garis terbagi ke 2-3 baris piksel: ambil max tetangga
+    # (tanpa np.roll: baris teratas tidak boleh ikut terbaca di baris paling bawah)
+    padded = np.pad(fill, 1)
+    fill = np.maximum(fill, np.maximum(padded[:-2], padded[2:]))
+    rows = np.flatnonzero(fill > LINE_MIN_FILL)
+    lines = []
+    for r in rows:
+        if lines and r - lines[-1][-1] <= 2:
+            lines[-1].append(r)
+        else:
+            lines.append([r])
+    return [y0 + int(np.mean(group)) for group in lines]
+
+
+def _snap(y, lines, height):
+    if not lines:
+        return y
+    nearest = min(lines, key=lambda line: abs(line - y))
+    return nearest if abs(nearest - y) <= SNAP_TOLERANCE * height else y
+
+
+def _table_bottom(lines, top, bottom, last_row):
+    # Garis bawah baris last_row kalau garis tabelnya cukup terdeteksi, selain itu garis bawah tabel
+    table = [line for line in lines if top - 2 <= line <= bottom]
+    if not table:
+        return bottom
+    if last_row and len(table) > last_row + TABLE_TITLE_ROWS:
+        return table[last_row + TABLE_TITLE_ROWS]
+    return table[-1]
+
+
+def find_regions(img, layout):
+    ink, (w, h) = _ink_mask(img)
+    bbox = _content_bbox(ink)
+    if bbox is None:
+        return None
+    x0, y0, x1, y1 = bbox
+    content_h = y1 - y0
+    lines = _horizontal_lines(ink, bbox)
+    scale_x, scale_y = img.width / w, img.height / h
+
+    regions = []
+    for name, spec in layout.items():
+        top_f, bottom_f = spec["span"]
+        top = _snap(y0 + top_f * content_h, lines, content_h) if top_f > 0 else y0
+        if bottom_f < 1:
+            bottom = _snap(y0 + bottom_f * content_h, lines, content_h)
+        else:
+            # Tanda tangan / catatan di bawah tabel tidak ikut dikirim
+            bottom = _table_bottom(lines, top, y1, spec.get("last_row"))
+        pad = REGION_PAD * content_h
+        # Batas antar blok tidak diberi padding supaya crop tidak tumpang tindih
+        box = (
+            int(max(0, x0 - pad) * scale_x),
+            int(max(0, top - (pad if top_f == 0 else 0)) * scale_y),
+            int(min(w, x1 + pad) * scale_x),
+            int(min(h, bottom + (pad if bottom_f >= 1 else 0)) * scale_y),
+        )
+        if box[3] - box[1] < 0.05 * img.height:
+            return None
+        regions.append((name, spec["label"], box))
+    return regions
+
+
+def prepare_regions(img, layout, budget=None, **opts):
+    budget = {**DEFAULT_BUDGET, **(budget or {})}
+    img = ImageOps.exif_transpose(img)
+    regions = find_regions(img, layout) if layout else None
+    if not regions:
+        # Layout tidak terdeteksi (foto terlalu gelap / bukan checksheet): kirim satu halaman penuh
+        return [(None, preprocess_image(img, budget, **opts))]
+
+    # Budget byte dibagi sesuai luas crop; sisi tiap crop diperkecil bersama kalau total pikselnya
+    # melebihi satu halaman penuh yang di-resize ke max_side
+    max_side = budget["max_side"]
+    sizes = [(b[2] - b[0], b[3] - b[1]) for _, _, b in regions]
+    areas = [cw * ch for cw, ch in sizes]
+    fit = [min(1.0, max_side / max(cw, ch)) for cw, ch in sizes]
+    page_px = img.width * img.height * min(1.0, max_side / max(img.size)) ** 2
+    crop_px = sum(area * f ** 2 for area, f in zip(areas, fit))
+    shrink = min(1.0, math.sqrt(page_px / crop_px))
+    prepared = []
+    for (name, label, box), (cw, ch), area, f in zip(regions, sizes, areas, fit):
+        crop_budget = {**budget, "max_bytes": int(budget["max_bytes"] * area / sum(areas)),
+                       "max_side": max(1, int(max(cw, ch) * f * shrink))}
+        prepared.append((label, preprocess_image(img.crop(box), crop_budget, **opts)))
+    return prepared
+
+
+def as_parts(prepared_regions):
+    parts = []
+    for label, prepared in prepared_regions:
+        if label:
+            parts.append(label)
+        parts.append(as_part(prepared))
+    return parts
+
+
+# --- ORIENTASI & DESKEW OTOMATIS ---
+# Dijalankan sekali per upload di resolusi kerja kecil, hasilnya diterapkan ke gambar asli.
+# Metode projection profile: baris teks/garis tabel yang lurus menghasilkan histogram
+# per-baris yang paling "tajam" (selisih antar baris paling besar).
+SKEW_RANGE = 6.0       # Derajat kemiringan maksimal yang dicari
+SKEW_MIN = 0.3         # Di bawah ini tidak perlu diputar (hemat resample)
+QUARTER_RATIO = 1.3    # Profil kolom harus jauh lebih tajam dari profil baris untuk dianggap miring 90°
+FLIP_RATIO = 1.5       # Garis tabel di setengah atas harus jauh lebih banyak untuk dianggap terbalik
+MAX_INK_POINTS = 60000
+_TRANSPOSE = {90: Image.ROTATE_90, 180: Image.ROTATE_180, 270: Image.ROTATE_270}
+
+
+def _profile_score(coord, offset=None):
+    if offset is not None:
+        coord = np.round(coord - offset).astype(int)
+        coord -= coord.min()
+    hist = np.bincount(coord)
+    return float(np.sum(np.diff(hist.astype(float)) ** 2))
+
+
+def _skew_angle(ys, xs):
+    # Coarse-to-fine: step 0.5° lalu 0.1° di sekitar kandidat terbaik. Return (sudut, skor profil setelah shear).
+    # Shear y - x*tan(a) cukup akurat untuk sudut kecil dan jauh lebih cepat dari rotate per sudut.
+    def best(angles):
+        scores = [_profile_score(ys, xs * np.tan(np.radians(a))) for a in angles]
+        i = int(np.argmax(scores))
+        return float(angles[i]), scores[i]
+    coarse, _ = best(np.arange(-SKEW_RANGE, SKEW_RANGE + 0.01, 0.5))
+    return best(np.arange(coarse - 0.5, coarse + 0.51, 0.1))
+
+
+def _ink_coords(img):
+    ink, _ = _ink_mask(img)
+    bbox = _content_bbox(ink)
+    if bbox is None:
+        return None, None
+    x0, y0, x1, y1 = bbox
+    ys, xs = np.nonzero(ink[y0:y1, x0:x1])
+    if ys.size > MAX_INK_POINTS:
+        # Sampling acak cukup untuk bentuk histogram, dan pencarian sudut jadi jauh lebih cepat
+        keep = np.random.default_rng(0).choice(ys.size, MAX_INK_POINTS, replace=False)
+        ys, xs = ys[keep], xs[keep]
+    return ys, xs
+
+
+def detect_orientation(img):
+    ys, xs = _ink_coords(img)
+    if ys is None or ys.size < 100:
+        return 0, 0.0
+
+    # 1+2. Tegak (0/180) atau tidur (90/270), sekaligus kemiringan kecil. Profil tanpa deskew tidak bisa
+    # dipakai untuk memilih: halaman tegak yang miring 2° profil barisnya sudah kabur dan kalah dari profil kolom.
+    # Jadi cari sudut terbaik untuk kedua kandidat, lalu bandingkan skor profil yang sudah diluruskan.
+    skew, score = _skew_angle(ys, xs)
+    skew_90, score_90 = _skew_angle(xs.max() - xs, ys)
+    quarter = 0
+    if score_90 > QUARTER_RATIO * score:
+        quarter, skew = 90, skew_90
+        ys, xs = xs.max() - xs, ys
+
+    # 3. Terbalik? Tabel pengujian (banyak garis horizontal panjang) ada di bagian bawah checksheet
+    ys = np.round(ys - xs * np.tan(np.radians(skew))).astype(int)
+    ys -= ys.min()
+    ink = np.zeros((ys.max() + 1, xs.max() + 1), dtype=bool)
+    ink[ys, xs] = True
+    lines = _horizontal_lines(ink, (0, 0, ink.shape[1], ink.shape[0]))
+    mid = ink.shape[0] / 2
+    top, bottom = sum(y < mid for y in lines), sum(y >= mid for y in lines)
+    if top > FLIP_RATIO * max(bottom, 1):
+        quarter = (quarter + 180) % 360
+    return quarter, round(skew, 2)
+
+
+def apply_orientation(img, quarter, skew):
+    if quarter:
+        img = img.transpose(_TRANSPOSE[quarter])
+    if abs(skew) >= SKEW_MIN:
+        fill = 255 if img.mode == "L" else (255,) * len(img.getbands())
+        img = img.rotate(skew, resample=Image.BICUBIC, expand=True, fillcolor=fill)
+    return img
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+import google.generativeai as genai
+from google.api_core import exceptions as gexc
+
+# --- PANGGILAN AI DENGAN TIMEOUT, RETRY & FALLBACK ---
+# Setiap attempt punya batas waktu sendiri, total satu scan juga dibatasi (deadline).
+# Error sementara (429/5xx/timeout/koneksi) di-retry dengan backoff + jitter; error permanen langsung gagal.
+# Kalau waktu yang sudah terpakai melewati latency_budget, attempt berikutnya pakai model fallback yang lebih cepat.
+RETRYABLE = (
+    gexc.TooManyRequests,
+    gexc.ResourceExhausted,
+    gexc.InternalServerError,
+    gexc.BadGateway,
+    gexc.ServiceUnavailable,
+    gexc.GatewayTimeout,
+    gexc.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+)
+
+
+class ModelCallError(Exception):
+    def __init__(self, message, attempts):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+def is_retryable(e):
+    if isinstance(e, RETRYABLE):
+        return True
+    code = getattr(e, "code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+
+class ModelCaller:
+    def __init__(self, model_name, fallback_name=None, attempt_timeout=30.0, deadline=60.0,
+                 latency_budget=20.0, max_attempts=4, base_backoff=1.0, max_backoff=8.0, model_factory=None):
+        # model_factory: default genai.GenerativeModel, bisa diganti backend stub untuk load test offline
+        model_factory = model_factory or genai.GenerativeModel
+        self.models = {model_name: model_factory(model_name)}
+        if fallback_name:
+            self.models[fallback_name] = model_factory(fallback_name)
+        self.model_name = model_name
+        self.fallback_name = fallback_name
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.latency_budget = latency_budget
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.history = deque(maxlen=1000) # Semua attempt terakhir, untuk statistik latency
+        self._lock = threading.Lock()
+
+    def _pick_model(self, elapsed):
+        if self.fallback_name and elapsed > self.latency_budget:
+            return self.fallback_name
+        return self.model_name
+
+    def _timeout(self, name, elapsed, remaining):
+        timeout = min(self.attempt_timeout, remaining)
+        if name != self.fallback_name and self.fallback_name:
+            # Model utama tidak boleh makan waktu melewati latency_budget, sisanya jatah fallback
+            timeout = min(timeout, self.latency_budget - elapsed)
+        return timeout
+
+    def _backoff(self, n, start):
+        # Exponential backoff + full jitter, tapi tidak melewati deadline
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (n - 1)))
+        return max(0.0, min(delay, self.deadline - (time.perf_counter() - start)))
+
+    def _record(self, attempts, **entry):
+        attempts.append(entry)
+        with self._lock:
+            self.history.append(entry)
+
+    def generate(self, parts, generation_config=None):
+        attempts = []
+        start = time.perf_counter()
+        for n in range(1, self.max_attempts + 1):
+            elapsed = time.perf_counter() - start
+            remaining = self.deadline - elapsed
+            if remaining <= 0:
+                break
+            name = self._pick_model(elapsed)
+            timeout = self._timeout(name, elapsed, remaining)
+            t0 = time.perf_counter()
+            try:
+                response = self.models[name].generate_content(
+                    parts,
+                    generation_config=generation_config,
+                    # Retry bawaan SDK dimatikan, retry diatur di sini supaya deadline total tetap terjaga
+                    request_options={"timeout": timeout, "retry": None},
+                )
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=True, error=None)
+                return response, attempts
+            except Exception as e:
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=False,
+                             error=f"{type(e).__name__}: {e}")
+                if not is_retryable(e):
+                    raise ModelCallError(f"Error permanen dari AI: {e}", attempts) from e
+            time.sleep(self._backoff(n, start))
+        last = attempts[-1]["error"] if attempts else "deadline habis"
+        raise ModelCallError(f"AI tidak merespons setelah {len(attempts)} percobaan: {last}", attempts)
+
+    # Versi asyncio: sama persis dengan generate(), tapi menunggu jaringan tanpa memblokir thread
+    async def agenerate(self, parts, generation_config=None):
+        attempts = []
+        start = time.perf_counter()
+        for n in range(1, self.max_attempts + 1):
+            elapsed = time.perf_counter() - start
+            remaining = self.deadline - elapsed
+            if remaining <= 0:
+                break
+            name = self._pick_model(elapsed)
+            timeout = self._timeout(name, elapsed, remaining)
+            t0 = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.models[name].generate_content_async(
+                        parts,
+                        generation_config=generation_config,
+                        request_options={"timeout": timeout, "retry": None},
+                    ),
+                    timeout,
+                )
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=True, error=None)
+                return response, attempts
+            except Exception as e:
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=False,
+                             error=f"{type(e).__name__}: {e}")
+                if not is_retryable(e):
+                    raise ModelCallError(f"Error permanen dari AI: {e}", attempts) from e
+            await asyncio.sleep(self._backoff(n, start))
+        last = attempts[-1]["error"] if attempts else "deadline habis"
+        raise ModelCallError(f"AI tidak merespons setelah {len(attempts)} percobaan: {last}", attempts)
+
+    @staticmethod
+    def _first_chunk(open_stream, timeout):
+        # Buka stream + next() pertama di thread terpisah: waktu tunggu chunk pertama dibatasi sendiri,
+        # tanpa memotong stream. Return (iterator chunk, chunk pertama atau None).
+        box = {}
+        done = threading.Event()
+
+        def run():
+            try:
+                chunks = iter(open_stream())
+                box["chunk"] = next(chunks, None)
+                box["chunks"] = chunks
+            except Exception as e:
+                box["error"] = e
+            done.set()
+
+        threading.Thread(target=run, name="stream-first-chunk", daemon=True).start()
+        if not done.wait(timeout):
+            raise TimeoutError(f"chunk pertama tidak datang dalam {timeout:.1f} detik")
+        if "error" in box:
+            raise box["error"]
+        return box["chunks"], box["chunk"]
+
+    # Versi streaming: retry hanya mungkin sebelum chunk pertama diterima. Setelah itu teks sudah
+    # tampil ke operator, jadi error di tengah stream diteruskan ke pemanggil sebagai ModelCallError.
+    # Dua batas waktu: chunk pertama (sama dengan timeout attempt biasa, supaya fallback masih sempat) dan
+    # seluruh stream (timeout request = sisa deadline), jadi respons panjang tidak terpotong di latency_budget.
+    # meta (dict, opsional) diisi model yang menjawab dan chunk terakhir (berisi usage_metadata total).
+    def stream(self, parts, generation_config=None, meta=None):
+        attempts = []
+        start = time.perf_counter()
+        for n in range(1, self.max_attempts + 1):
+            elapsed = time.perf_counter() - start
+            remaining = self.deadline - elapsed
+            if remaining <= 0:
+                break
+            name = self._pick_model(elapsed)
+            timeout = self._timeout(name, elapsed, remaining)
+            t0 = time.perf_counter()
+            try:
+                chunks, first = self._first_chunk(lambda: self.models[name].generate_content(
+                    parts,
+                    generation_config=generation_config,
+                    stream=True,
+                    request_options={"timeout": remaining, "retry": None},
+                ), timeout)
+            except Exception as e:
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=False,
+                             error=f"{type(e).__name__}: {e}")
+                if not is_retryable(e):
+                    raise ModelCallError(f"Error permanen dari AI: {e}", attempts) from e
+                time.sleep(self._backoff(n, start))
+                continue
+
+            last = first
+            if first is not None:
+                yield first.text
+            try:
+                for chunk in chunks:
+                    last = chunk
+                    yield chunk.text
+            except Exception as e:
+                # Attempt yang putus di tengah juga dicatat: justru ini ekor latency yang mau dilihat
+                self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=False,
+                             error=f"{type(e).__name__}: {e}")
+                raise ModelCallError(f"Stream AI terputus: {type(e).__name__}: {e}", attempts) from e
+            if meta is not None:
+                meta.update(model=name, response=last)
+            self._record(attempts, model=name, attempt=n, latency=time.perf_counter() - t0, ok=True, error=None)
+            return
+        last = attempts[-1]["error"] if attempts else "deadline habis"
+        raise ModelCallError(f"AI tidak merespons setelah {len(attempts)} percobaan: {last}", attempts)
+
+    def latency_stats(self):
+        with self._lock:
+            entries = list(self.history)
+        stats = {}
+        for name in self.models:
+            lat = sorted(e["latency"] for e in entries if e["model"] == name)
+            if not lat:
+                continue
+            fails = sum(1 for e in entries if e["model"] == name and not e["ok"])
+            stats[name] = {
+                "count": len(lat),
+                "failed": fails,
+                "p50": lat[len(lat) // 2],
+                "p95": lat[min(len(lat) - 1, int(len(lat) * 0.95))],
+                "max": lat[-1],
+            }
+        return stats
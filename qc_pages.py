@@ -0,0 +1,94 @@
+import os
+
+from PIL import Image, ImageOps
+
+from qc_image import load_image, load_reduced
+
+# --- INPUT MULTI-HALAMAN (PDF / TIFF) ---
+# Sertifikat supplier sering berupa PDF/TIFF hasil scan beberapa halaman. Halaman dibuka satu per satu
+# (generator), di-render langsung di resolusi yang dibutuhkan, jadi memori cukup untuk satu halaman
+# dan halaman pertama sudah bisa dikirim ke AI sebelum halaman terakhir di-decode.
+# PDF butuh pypdfium2 (pip install pypdfium2); TIFF cukup Pillow.
+UPLOAD_TYPES = ["jpg", "jpeg", "png", "pdf", "tif", "tiff"]
+PAGED_EXT = (".pdf", ".tif", ".tiff")
+PAGE_SIDE = 2400 # Sisi terpanjang render halaman untuk ekstraksi (crop ROI masih cukup tajam setelah di-resize)
+MAX_DPI = 300 # Halaman kecil tidak di-render melebihi resolusi scan aslinya
+
+
+def is_paged(name):
+    return os.path.splitext(name or "")[1].lower() in PAGED_EXT
+
+
+def _is_pdf(name):
+    return os.path.splitext(name or "")[1].lower() == ".pdf"
+
+
+def _open_pdf(source):
+    import pypdfium2 as pdfium
+    # File-like (termasuk file spool di disk) dibaca pdfium per bagian sesuai kebutuhan, tidak dimuat penuh
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return pdfium.PdfDocument(source)
+
+
+def _render_pdf_page(page, max_side):
+    w, h = page.get_size() # Satuan point (1/72 inch)
+    scale = min(max_side / max(w, h), MAX_DPI / 72)
+    return page.render(scale=scale).to_pil()
+
+
+def _tiff_frame(img, index, max_side):
+    img.seek(index)
+    frame = img.copy()
+    if max_side:
+        frame.thumbnail((max_side, max_side))
+    return ImageOps.exif_transpose(frame)
+
+
+def count_pages(source, name):
+    if not is_paged(name):
+        return 1
+    if _is_pdf(name):
+        pdf = _open_pdf(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    with Image.open(source) as img:
+        return getattr(img, "n_frames", 1)
+
+
+def load_page(source, name, index=0, max_side=PAGE_SIDE):
+    # Satu halaman saja (preview / scan tunggal). max_side=None -> gambar biasa di-decode penuh
+    if not is_paged(name):
+        return load_reduced(source, max_side) if max_side else load_image(source)
+    if _is_pdf(name):
+        pdf = _open_pdf(source)
+        try:
+            return _render_pdf_page(pdf[index], max_side or PAGE_SIDE)
+        finally:
+            pdf.close()
+    with Image.open(source) as img:
+        return _tiff_frame(img, index, max_side)
+
+
+def iter_pages(source, name, max_side=PAGE_SIDE):
+    # Generator (nomor halaman mulai 0, gambar); halaman berikutnya baru di-render saat diminta
+    if not is_paged(name):
+        yield 0, load_image(source, max_side)
+        return
+    if _is_pdf(name):
+        pdf = _open_pdf(source)
+        try:
+            for i in range(len(pdf)):
+                page = pdf[i]
+                try:
+                    yield i, _render_pdf_page(page, max_side)
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+        return
+    with Image.open(source) as img:
+        for i in range(getattr(img, "n_frames", 1)):
+            yield i, _tiff_frame(img, i, max_side)
@@ -0,0 +1,77 @@
+from qc_cache import image_hash, make_key, prompt_version
+from qc_config import MAT_CONFIG
+from qc_image import prepare_regions, as_parts, load_image, detect_orientation, apply_orientation
+from qc_pages import is_paged, load_page
+from qc_prompt import get_prompt
+from qc_refine import parse_model_output, apply_refinery
+from qc_schema import build_response_schema, schema_text, normalize_result
+from qc_trace import span
+from qc_vocab import snap_result
+
+# --- PIPELINE EKSTRAKSI (DIPAKAI APP & BENCHMARK) ---
+# Satu tempat untuk membangun request AI dan merapikan hasilnya, supaya benchmark mengukur
+# jalur yang sama persis dengan app (dan fingerprint cassette-nya cocok).
+
+# Foto JPEG di-decode langsung di skala 1/2, 1/4 atau 1/8 selama sisi terpanjangnya masih >= nilai ini
+# (foto 12 MP -> 2016x1512). Cek akurasi dulu sebelum mengubah: python bench_golden.py corpus/ --decode-side N
+DECODE_SIDE = 2000
+
+
+def decode_image(source, name=None, page=0, decode_side=DECODE_SIDE):
+    # Gambar untuk AI (dan untuk deteksi orientasi): PDF/TIFF satu halaman, foto di-decode dengan draft
+    return load_page(source, name, page) if is_paged(name) else load_image(source, decode_side)
+
+
+def prepare_image(img, orientation=None, angle=0, tracer=None):
+    # orientation=None -> dideteksi dari gambar ini; app mengirim hasil deteksi yang sudah di-cache per halaman
+    with span(tracer, "rotate"):
+        quarter, skew = orientation if orientation is not None else detect_orientation(img)
+        img = apply_orientation(img, quarter, skew)
+        # Putar manual dari tombol di app (kalau deteksi otomatis masih salah)
+        return img.rotate(angle, expand=True) if angle else img
+
+
+def build_request(image, material_type, roi=True, tracer=None, prompt_mode="compiled"):
+    cfg = MAT_CONFIG[material_type]
+    # Kirim crop header + tabel saja; kalau layout tidak terdeteksi otomatis kembali ke satu halaman penuh
+    with span(tracer, "encode"):
+        regions = prepare_regions(image, cfg["layout"] if roi else None, cfg["image_budget"])
+    prompt = get_prompt(material_type, prompt_mode)
+
+    image_bytes = b"".join(prepared["data"] for _, prepared in regions)
+    cache_key = make_key(image_hash(image_bytes), material_type, prompt_version(prompt + schema_text(material_type)))
+
+    # Output dipaksa mengikuti schema dari MAT_CONFIG (key + enum film/supplier)
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_schema": build_response_schema(material_type),
+    }
+    return [prompt] + as_parts(regions), generation_config, cache_key
+
+
+def is_complete(data):
+    # Hasil yang dipulihkan dari output terpotong tidak boleh masuk cache: scan ulang harus memanggil AI lagi
+    return data.get("_parse") != "partial" and not data.get("_missing")
+
+
+def upload_bytes(parts):
+    return sum(len(p["data"]) for p in parts if isinstance(p, dict) and "data" in p)
+
+
+def finish_result(text, material_type, tracer=None):
+    with span(tracer, "parse"):
+        data, status = parse_model_output(text)
+    return finish_parsed(data, status, material_type, tracer=tracer)
+
+
+def finish_parsed(data, status, material_type, tracer=None):
+    # Untuk pemanggil yang sudah parse sendiri (benchmark butuh no_batch mentah), supaya PARSE_STATS tidak dobel.
+    # Span 'parse' hanya milik finish_result: normalize masuk tahap 'refine' supaya tiap scan satu span per tahap.
+    with span(tracer, "refine"):
+        # Semua field wajib di schema: key yang hilang berarti output terpotong / tidak lengkap
+        missing = [key for key in MAT_CONFIG[material_type]["fields"] if key not in data]
+        data = normalize_result(data, material_type)
+        data["_parse"] = status
+        data["_missing"] = missing
+        # Rapikan nomor batch dulu, baru snap film/supplier/ID batch ke vocabulary material
+        return snap_result(apply_refinery(data), material_type)
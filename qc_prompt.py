@@ -0,0 +1,108 @@
+import argparse
+import math
+import os
+from functools import lru_cache
+
+from qc_cache import prompt_version
+from qc_config import MAT_CONFIG
+
+# --- KOMPILER PROMPT ---
+# Prompt tulisan tangan di MAT_CONFIG mengulang blok UKURAN / NO BATCH / template JSON yang hampir sama
+# di keenam material. Di sini prompt disusun dari fragmen bersama + prompt_spec per material.
+# Daftar film/supplier/ketebalan/ID batch dan key JSON tidak ditulis ulang: semuanya sudah dikirim
+# lewat response schema (qc_schema), jadi prompt cukup menunjuk ke schema.
+# Laporan token: python qc_prompt.py   (tambah --api untuk hitungan token asli dari Gemini)
+PROMPT_MODES = ("compiled", "legacy")
+
+INTRO = (
+    "Analisa checksheet {mat} ini dengan sangat teliti. Isi JSON sesuai schema. "
+    "Jangan menebak jika tulisan tidak terlihat, kosongkan saja. Gunakan titik (.) untuk desimal."
+)
+UKURAN = (
+    "UKURAN: ambil dari baris 'Ukuran' di header, BUKAN dari tabel 'Hasil' baris 2 (lebar) dan 3 (ketebalan). "
+    "lebar = angka sebelum 'mm', thickness = angka sebelum 'um'/'u'."
+)
+NO_BATCH = (
+    "NO BATCH: satu baris 'No. Batch (INTERNAL)' di header, format XXXXX/(ID)/XXXXX/(IDS); ID dan IDS wajib dari "
+    "daftar di schema. Segmen tambahan setelah IDS (contoh /FZF, /PROD) JANGAN dihapus. "
+    "Contoh: '{raw}' diekstrak sebagai '{fixed}'."
+)
+NAMA_FILM = "NAMA FILM: selalu diawali \"{prefix}\"{suffix}, pilih dari daftar nama_film di schema."
+THICKNESS_SUFFIX = " lalu varian dan thickness (contoh \"{example}\")"
+SURAT_JALAN = "NO SURAT JALAN: salah satu format {formats}."
+COF_PAIR = "COF: format '0.XX / 0.XX'."
+MECH = (
+    "TABEL PENGUJIAN: baris {r1} Tensile, baris {r2} Elongation (bisa '> 1400'), baris {r3} Modulus Young "
+    "(integer). Nilai MD = atas, TD = bawah."
+)
+
+
+def _film_example(vocab):
+    return f"{vocab['film_prefix']} {vocab['film_variants'][0]}-{vocab['thickness'][-1]}"
+
+
+@lru_cache(maxsize=None)
+def compile_prompt(material_type):
+    cfg = MAT_CONFIG[material_type]
+    spec, vocab = cfg["prompt_spec"], cfg["vocab"]
+    suffix = THICKNESS_SUFFIX.format(example=_film_example(vocab)) if vocab.get("thickness") else ""
+    raw, fixed = spec["batch_example"]
+    lines = [
+        INTRO.format(mat=material_type),
+        UKURAN,
+        NO_BATCH.format(raw=raw, fixed=fixed),
+        NAMA_FILM.format(prefix=vocab["film_prefix"], suffix=suffix),
+        SURAT_JALAN.format(formats=", ".join(spec["surat_jalan"])),
+    ]
+    if spec["cof_pair"] and "cof" in cfg["fields"]:
+        lines.append(COF_PAIR)
+    if spec["mech_rows"]:
+        r1, r2, r3 = spec["mech_rows"]
+        lines.append(MECH.format(r1=r1, r2=r2, r3=r3))
+    return "\n".join(lines)
+
+
+def get_prompt(material_type, mode="compiled"):
+    if mode == "legacy":
+        return MAT_CONFIG[material_type]["prompt"]
+    if mode != "compiled":
+        raise ValueError(f"Mode prompt tidak dikenal: {mode}")
+    return compile_prompt(material_type)
+
+
+def prompt_stamp(material_type, mode="compiled"):
+    # Versi = hash isi prompt, ikut masuk ke key cache hasil scan dan log pemakaian token
+    return f"{mode}-{prompt_version(get_prompt(material_type, mode))}"
+
+
+def estimate_tokens(text):
+    # Perkiraan kasar tanpa API: ~4 karakter per token, spasi indentasi prompt lama tetap dihitung
+    return math.ceil(len(text) / 4)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bandingkan jumlah token prompt lama vs prompt hasil kompilasi")
+    ap.add_argument("--api", action="store_true", help="Hitung token dengan count_tokens Gemini (butuh GEMINI_API_KEY)")
+    ap.add_argument("--model", default="gemini-2.5-flash")
+    ap.add_argument("--show", help="Cetak prompt hasil kompilasi untuk material ini")
+    args = ap.parse_args()
+
+    if args.show:
+        print(compile_prompt(args.show))
+        return
+
+    count = estimate_tokens
+    if args.api:
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        model = genai.GenerativeModel(args.model)
+        count = lambda text: model.count_tokens(text).total_tokens
+
+    print(f"{'material':<8} {'lama':>6} {'kompilasi':>10} {'hemat':>7}  versi")
+    for mat in MAT_CONFIG:
+        old, new = count(get_prompt(mat, "legacy")), count(get_prompt(mat, "compiled"))
+        print(f"{mat:<8} {old:>6} {new:>10} {(old - new) / old * 100:>6.0f}%  {prompt_stamp(mat)}")
+
+
+if __name__ == "__main__":
+    main()
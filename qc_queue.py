@@ -0,0 +1,201 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from qc_sheets import append_rows
+
+# --- ANTRIAN KIRIM KE SHEET (WRITE-BEHIND) ---
+# Setiap baris yang dikonfirmasi operator langsung ditulis ke SQLite lokal (durable),
+# lalu thread flusher mengirimkannya ke Google Sheets per batch.
+# Kalau server restart, baris 'pending' di journal dikirim ulang saat flusher jalan lagi.
+DEFAULT_JOURNAL_PATH = os.path.join(".qc_cache", "sheet_journal.sqlite")
+
+PENDING = "pending"
+FLUSHED = "flushed"
+
+
+class SheetJournal:
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL + synchronous=FULL: baris yang sudah di-commit tetap ada walau proses mati mendadak
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, created REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_try REAL NOT NULL DEFAULT 0, sheet_row INTEGER, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS journal_status ON journal(status, id)")
+        # Journal lama (sebelum ada tracing) belum punya kolom scan_id
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(journal)")}
+        if "scan_id" not in columns:
+            self._db.execute("ALTER TABLE journal ADD COLUMN scan_id TEXT")
+        self._db.commit()
+
+    def enqueue(self, row, scan_id=None):
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO journal (payload, status, created, scan_id) VALUES (?, ?, ?, ?)",
+                (json.dumps(row, ensure_ascii=False), PENDING, time.time(), scan_id),
+            )
+            self._db.commit()
+            return cur.lastrowid
+
+    def take_pending(self, limit):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload, next_try, scan_id FROM journal WHERE status = ? ORDER BY id LIMIT ?",
+                (PENDING, limit),
+            ).fetchall()
+        # Urutan baris di sheet harus sama dengan urutan konfirmasi: selama baris terdepan
+        # masih menunggu backoff, baris di belakangnya juga ikut menunggu
+        if rows and rows[0][2] > time.time():
+            return []
+        return [(rid, json.loads(payload), scan_id) for rid, payload, _, scan_id in rows]
+
+    def mark_flushed(self, ids, first_row):
+        with self._lock:
+            for i, rid in enumerate(ids):
+                sheet_row = first_row + i if first_row else None
+                self._db.execute(
+                    "UPDATE journal SET status = ?, sheet_row = ?, error = NULL WHERE id = ?",
+                    (FLUSHED, sheet_row, rid),
+                )
+            self._db.commit()
+
+    def mark_failed(self, ids, error, delay):
+        with self._lock:
+            for rid in ids:
+                self._db.execute(
+                    "UPDATE journal SET attempts = attempts + 1, next_try = ?, error = ? WHERE id = ?",
+                    (time.time() + delay, str(error)[:500], rid),
+                )
+            self._db.commit()
+
+    def get(self, rid):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, sheet_row, attempts, error FROM journal WHERE id = ?", (rid,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("status", "sheet_row", "attempts", "error"), row))
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM journal GROUP BY status").fetchall()
+        counts = {PENDING: 0, FLUSHED: 0}
+        counts.update(dict(rows))
+        return counts
+
+
+def _is_quota_error(e):
+    resp = getattr(e, "response", None)
+    return getattr(resp, "status_code", None) == 429
+
+
+class SheetFlusher:
+    # quota_per_min: batas write request Sheets API per menit (default kuota Google = 60/menit/user,
+    # disisakan sedikit untuk request lain)
+    def __init__(self, journal, sheet_client, batch_size=50, interval=2.0, quota_per_min=50,
+                 base_backoff=2.0, max_backoff=300.0, tracer=None):
+        self.journal = journal
+        self.tracer = tracer
+        self.sheet_client = sheet_client
+        self.batch_size = batch_size
+        self.interval = interval
+        self.quota_per_min = quota_per_min
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.last_error = None
+        self._failures = 0
+        self._requests = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sheet-flusher", daemon=True)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _wait_for_quota(self):
+        now = time.time()
+        while self._requests and now - self._requests[0] > 60:
+            self._requests.popleft()
+        if len(self._requests) >= self.quota_per_min:
+            return 60 - (now - self._requests[0])
+        return 0
+
+    def _backoff(self, quota_hit):
+        self._failures += 1
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (self._failures - 1)))
+        if quota_hit:
+            # Kuota per menit habis: minimal tunggu jendela kuota berikutnya
+            delay = max(delay, 60.0)
+        return delay * random.uniform(0.5, 1.0)
+
+    def flush_once(self):
+        wait = self._wait_for_quota()
+        if wait > 0:
+            return wait
+        batch = self.journal.take_pending(self.batch_size)
+        if not batch:
+            return None
+        ids = [rid for rid, _, _ in batch]
+        rows = [row for _, row, _ in batch]
+        start = time.perf_counter()
+        self._requests.append(time.time())
+        try:
+            first_row = append_rows(self.sheet_client.worksheet(), rows)
+        except Exception as e:
+            quota_hit = _is_quota_error(e)
+            if not quota_hit:
+                self.sheet_client.reset()
+            delay = self._backoff(quota_hit)
+            self.last_error = str(e)
+            self.journal.mark_failed(ids, e, delay)
+            self._trace(batch, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            return delay
+        finally:
+            self.sheet_client.record_latency(time.perf_counter() - start)
+        self._trace(batch, time.perf_counter() - start)
+        self._failures = 0
+        self.last_error = None
+        self.journal.mark_flushed(ids, first_row)
+        # Masih ada sisa antrian? langsung lanjut batch berikutnya
+        return 0 if len(batch) == self.batch_size else None
+
+    def _trace(self, batch, seconds, error=None):
+        # Satu span per baris: durasi kirim batch yang dialami scan tersebut
+        if self.tracer:
+            for rid, _, scan_id in batch:
+                self.tracer.record("sheet_save", seconds, scan_id or f"job-{rid}", error=error, rows=len(batch))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self.flush_once()
+            except Exception as e:
+                self.last_error = str(e)
+                wait = self.interval
+            if wait == 0:
+                continue
+            self._wake.wait(self.interval if wait is None else wait)
+            self._wake.clear()
@@ -0,0 +1,211 @@
+import json
+import re
+import threading
+from datetime import datetime
+
+MONTH_MAP = {'A': '10', 'B': '11', 'C': '12'}
+
+# --- 2. FUNGSI AUTOCORRECT & REGEX BATCH ---
+def refine_batch_number(raw_batch):
+    if not raw_batch or len(str(raw_batch)) < 5:
+        return str(raw_batch), ""
+    
+    # 1. Normalisasi teks
+    text = str(raw_batch).upper().strip()
+    
+    # Fungsi Koreksi Karakter OCR
+    def fix_date_chars(s):
+        return s.replace('O', '0').replace('I', '1').replace('L', '1').replace('S', '5').replace('J', '1')
+
+    # 2. Ambil 5 karakter pertama (YYMDD)
+    p1_raw = fix_date_chars(text[:5])
+    
+    tgl_kedatangan = ""
+    try:
+        # Ekstraksi YY, M, DD
+        yy = "20" + p1_raw[0:2]
+        m_char = p1_raw[2]
+        dd = p1_raw[3:5]
+        
+        # Logika Mapping Bulan
+        mm = None
+        if m_char in MONTH_MAP:
+            mm = MONTH_MAP[m_char] # Mengambil A, B, atau C
+        elif m_char.isdigit():
+            mm = m_char.zfill(2)   # Mengambil 1-9 menjadi 01-09
+            
+        if mm and int(mm) <= 12:
+            # Bentuk format DD-MM-YYYY
+            date_str = f"{dd}-{mm}-{yy}"
+            # Validasi kebenaran tanggal (mencegah tanggal 32, dsb)
+            datetime.strptime(date_str, "%d-%m-%Y")
+            tgl_kedatangan = date_str
+    except Exception:
+        tgl_kedatangan = "Tidak Terdeteksi" # Jika gagal, biarkan kosong agar bisa diisi manual
+
+    # 3. Merapikan format nomor batch (Regex)
+    parts = re.split(r'[^A-Z0-9]', text)
+    parts = [p for p in parts if p]
+    
+    if len(parts) >= 4:
+        def fix_text_chars(s):
+            return s.replace('0', 'O').replace('1', 'I').replace('5', 'S').replace('8', 'B')
+        
+        # Susun ulang dengan pemisah '/' yang standar
+        p1 = p1_raw
+        p2 = fix_text_chars(parts[1])
+        p3 = fix_date_chars(parts[2])
+        p4 = fix_text_chars(parts[3])
+        extra = parts[4:]
+        cleaned_batch = "/".join([p1, p2, p3, p4] + extra)
+    else:
+        cleaned_batch = text
+
+    return cleaned_batch, tgl_kedatangan
+
+
+# --- REFINE NOMOR BATCH MASSAL (SATU KOLOM SEKALIGUS) ---
+# Hasil sama persis dengan refine_batch_number, tapi pakai tabel translate + regex yang sudah dikompilasi,
+# validasi tanggal tanpa strptime, dan nilai yang berulang hanya dihitung sekali.
+# Pola yang tidak lazim (bulan '0', karakter non-angka di tanggal, dsb) tetap lewat refine_batch_number.
+_DATE_FIX = str.maketrans("OILSJ", "01151")
+_TEXT_FIX = str.maketrans("0158", "OISB")
+_BATCH_SEP = re.compile(r"[^A-Z0-9]+")
+_DATE_CODE = re.compile(r"(\d\d)([1-9ABC])(\d\d)", re.ASCII)
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _arrival_date(p1):
+    m = _DATE_CODE.fullmatch(p1)
+    if m is None:
+        return None
+    yy, m_char, dd = m.groups()
+    month = int(MONTH_MAP.get(m_char, m_char))
+    year, day = 2000 + int(yy), int(dd)
+    leap = month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    if 1 <= day <= _MONTH_DAYS[month - 1] + leap:
+        return f"{dd}-{month:02d}-{year}"
+    return "Tidak Terdeteksi"
+
+
+def _refine_fast(raw):
+    text = str(raw).upper().strip()
+    p1 = text[:5].translate(_DATE_FIX)
+    tgl = _arrival_date(p1)
+    if tgl is None:
+        return refine_batch_number(raw)
+    parts = [p for p in _BATCH_SEP.split(text) if p]
+    if len(parts) >= 4:
+        cleaned = "/".join([p1, parts[1].translate(_TEXT_FIX), parts[2].translate(_DATE_FIX),
+                            parts[3].translate(_TEXT_FIX)] + parts[4:])
+    else:
+        cleaned = text
+    return cleaned, tgl
+
+
+def refine_batch_numbers(values):
+    # values: iterable nomor batch mentah -> list (nomor batch rapi, tanggal kedatangan)
+    memo = {}
+    out = []
+    for raw in values:
+        if not raw or len(str(raw)) < 5:
+            out.append((str(raw), ""))
+            continue
+        key = str(raw)
+        res = memo.get(key)
+        if res is None:
+            res = memo[key] = _refine_fast(key)
+        out.append(res)
+    return out
+
+
+# --- PARSING OUTPUT AI ---
+# Dengan response schema output hampir selalu JSON valid. Kalau tetap rusak (terpotong, koma berlebih,
+# ada teks tambahan), coba pulihkan dulu sebelum menyerah, supaya panggilan AI yang sudah dibayar tidak terbuang.
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_JSON_PAIR = re.compile(r'"(\w+)"\s*:\s*(?:"((?:[^"\\]|\\.)*)"|(null|-?\d+(?:\.\d+)?))')
+
+PARSE_STATS = {"ok": 0, "recovered": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+def _count(kind):
+    with _stats_lock:
+        PARSE_STATS[kind] += 1
+
+def parse_failure_rate():
+    with _stats_lock:
+        total = sum(PARSE_STATS.values())
+        return PARSE_STATS["failed"] / total if total else 0.0
+
+def parse_model_json(text):
+    return parse_model_output(text)[0]
+
+# Return (data, status): "ok" = JSON valid, "recovered" = JSON utuh setelah dibersihkan,
+# "partial" = JSON terpotong, hanya pasangan key/value yang utuh (hasil tidak lengkap, jangan di-cache)
+def parse_model_output(text):
+    clean_json = text.strip().replace('```json', '').replace('```', '')
+    try:
+        data = json.loads(clean_json)
+        _count("ok")
+        return data, "ok"
+    except ValueError:
+        pass
+
+    # 1. Ambil blok {...} saja dan buang koma sebelum } / ]
+    start, end = clean_json.find('{'), clean_json.rfind('}')
+    if start != -1 and end > start:
+        try:
+            data = json.loads(_TRAILING_COMMA.sub(r'\1', clean_json[start:end + 1]))
+            _count("recovered")
+            return data, "recovered"
+        except ValueError:
+            pass
+
+    # 2. JSON terpotong: ambil pasangan "key": "value" yang masih utuh
+    pairs = {}
+    for key, str_val, raw_val in _JSON_PAIR.findall(clean_json):
+        if str_val or not raw_val:
+            pairs[key] = json.loads(f'"{str_val}"')
+        else:
+            pairs[key] = None if raw_val == "null" else raw_val
+    if pairs:
+        _count("recovered")
+        return pairs, "partial"
+
+    _count("failed")
+    raise ValueError(f"Output AI bukan JSON: {clean_json[:80]!r}")
+
+def apply_refinery(data):
+    # JALANKAN REFINERY DI SINI
+    batch_raw = data.get('no_batch', '')
+    cleaned_b, tgl_kedatangan = refine_batch_number(batch_raw)
+    
+    # Masukkan kembali ke dictionary hasil scan
+    data['no_batch'] = cleaned_b
+    data['tanggal_kedatangan_batch'] = tgl_kedatangan
+    return data
+
+
+# --- PARSER JSON BERTAHAP (UNTUK STREAMING) ---
+# Dipanggil tiap chunk datang; mengembalikan pasangan key/value yang baru selesai ter-decode.
+# Value string baru dianggap selesai setelah tanda kutip penutupnya muncul, angka/null setelah ',' atau '}'.
+_STREAM_PAIR = re.compile(r'"(\w+)"\s*:\s*(?:"((?:[^"\\]|\\.)*)"|(null|-?\d+(?:\.\d+)?)(?=\s*[,}]))')
+
+class StreamingJSONParser:
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.fields = {}
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        new = {}
+        for m in _STREAM_PAIR.finditer(self.buffer, self.pos):
+            key, str_val, raw_val = m.groups()
+            if raw_val is None:
+                value = json.loads(f'"{str_val}"')
+            else:
+                value = None if raw_val == "null" else raw_val
+            self.fields[key] = new[key] = value
+            self.pos = m.end()
+        return new
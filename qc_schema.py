@@ -0,0 +1,76 @@
+import json
+from functools import lru_cache
+
+from qc_config import MAT_CONFIG
+
+# --- RESPONSE SCHEMA AI (DIBANGUN DARI MAT_CONFIG) ---
+# Field dan daftar nilai valid (film, supplier, ketebalan) diambil dari MAT_CONFIG,
+# jadi model dipaksa mengembalikan JSON dengan key dan enum yang benar.
+FIELD_DESC = {
+    "tanggal": "Tanggal checksheet, format dd-mm-yyyy",
+    "ukuran": "Format 'xx μm x XXX mm' dari baris Ukuran di header",
+    "lebar": "Angka sebelum 'mm' di baris Ukuran header",
+    "thickness": "Angka sebelum 'um'/'u' di baris Ukuran header",
+    "no_po": "Format PO-XX-XXXXXX",
+    "jml_datang": "Angka bulat",
+    "cof": "Gunakan titik untuk desimal",
+}
+
+
+def film_names(vocab):
+    prefix = vocab["film_prefix"]
+    if vocab.get("thickness"):
+        # PET/VMPET/OPP: nama film diikuti ketebalan, contoh 'PET IF-9'
+        return [f"{prefix} {v}-{t}" for v in vocab["film_variants"] for t in vocab["thickness"]]
+    return [f"{prefix} {v}" for v in vocab["film_variants"]]
+
+
+def _enum(values, desc=None):
+    prop = {"type": "STRING", "format": "enum", "enum": list(values), "nullable": True}
+    if desc:
+        prop["description"] = desc
+    return prop
+
+
+@lru_cache(maxsize=None)
+def _build(material_type):
+    cfg = MAT_CONFIG[material_type]
+    vocab = cfg["vocab"]
+    props = {}
+    for key in cfg["fields"]:
+        prop = {"type": "STRING", "nullable": True}
+        if key in FIELD_DESC:
+            prop["description"] = FIELD_DESC[key]
+        props[key] = prop
+
+    props["nama_film"] = _enum(film_names(vocab))
+    props["supplier"] = _enum(vocab["suppliers"])
+    if vocab.get("thickness"):
+        props["thickness"] = _enum(vocab["thickness"], FIELD_DESC["thickness"])
+    props["no_batch"] = {
+        "type": "STRING",
+        "nullable": True,
+        "description": (
+            "Format XXXXX/(ID)/XXXXX/(IDS)[/segmen tambahan]. "
+            f"ID salah satu dari {', '.join(vocab['batch_id'])}. "
+            f"IDS salah satu dari {', '.join(vocab['batch_ids'])}."
+        ),
+    }
+    return json.dumps({"type": "OBJECT", "properties": props, "required": list(cfg["fields"])})
+
+
+def build_response_schema(material_type):
+    # Selalu kembalikan dict baru: SDK boleh memodifikasi schema yang dikirim
+    return json.loads(_build(material_type))
+
+
+def schema_text(material_type):
+    return _build(material_type)
+
+
+def normalize_result(data, material_type):
+    # Field nullable/hilang -> string kosong supaya form verifikasi tidak menampilkan 'None'
+    for key in MAT_CONFIG[material_type]["fields"]:
+        value = data.get(key)
+        data[key] = "" if value is None else str(value)
+    return data
@@ -0,0 +1,113 @@
+import re
+import threading
+from collections import deque
+
+import gspread
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+
+# Catatan durasi kirim ke sheet, dipakai SheetClient maupun backend sheet lokal
+class LatencyLog:
+    def __init__(self):
+        self.latencies = deque(maxlen=200) # Durasi save terakhir (detik), untuk monitoring
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    def latency_stats(self):
+        vals = sorted(self.latencies)
+        if not vals:
+            return None
+        return {
+            "count": len(vals),
+            "last": self.latencies[-1],
+            "p50": vals[len(vals) // 2],
+            "max": vals[-1],
+        }
+
+
+# --- LAYOUT SHEET QC ---
+# Baris 1 = header, data mulai baris 2. Urutan kolom A..X sama dengan baris dari build_sheet_row di app.py.
+SHEET_HEADER = [
+    "Tanggal Kedatangan (Batch)", "Tanggal Checksheet", "Ukuran", "No Surat Jalan", "No PO", "Nomor Batch",
+    "", "Satuan", "Jumlah Datang", "", "COF", "Seal Temperature", "Nilai Seal", "Tensile MD", "Tensile TD",
+    "Elongation MD", "Elongation TD", "Modulus MD", "Modulus TD", "", "Bonding Metalize", "", "Supplier",
+    "Sampling Size",
+]
+FIRST_DATA_ROW = 2
+
+
+# --- KONEKSI GOOGLE SHEETS (SATU PER PROSES) ---
+# Credentials, client gspread (dan connection pool HTTP-nya) serta handle worksheet
+# dibuat sekali lalu dipakai bersama oleh semua session Streamlit.
+class SheetClient(LatencyLog):
+    def __init__(self, service_account_info, sheet_name, sheet_key=None):
+        super().__init__()
+        self.sheet_name = sheet_name
+        self.sheet_key = sheet_key
+        self._info = dict(service_account_info)
+        self._lock = threading.Lock()
+        self._creds = None
+        self._client = None
+        self._sheet = None
+
+    def _connect(self):
+        self._creds = Credentials.from_service_account_info(self._info, scopes=SCOPES)
+        self._client = gspread.authorize(self._creds)
+        # open_by_key langsung ke spreadsheet, open() harus cari nama file lewat Drive dulu
+        if self.sheet_key:
+            self._sheet = self._client.open_by_key(self.sheet_key).sheet1
+        else:
+            self._sheet = self._client.open(self.sheet_name).sheet1
+
+    def worksheet(self):
+        with self._lock:
+            if self._sheet is None:
+                self._connect()
+            elif not self._creds.valid:
+                # Token hampir/sudah kadaluarsa: refresh saja, tidak perlu authorize ulang
+                self._creds.refresh(Request())
+            return self._sheet
+
+    # Dipanggil kalau request gagal karena koneksi/auth, supaya save berikutnya konek ulang
+    def reset(self):
+        with self._lock:
+            self._creds = self._client = self._sheet = None
+
+
+# --- APPEND BARIS (TANPA BACA SHEET) ---
+# Pakai values.append milik Sheets API: server yang menentukan baris kosong berikutnya secara atomik,
+# jadi tidak perlu get_all_values() dan dua operator yang kirim bersamaan tidak saling timpa.
+_RANGE_ROW = re.compile(r"![A-Z]+(\d+)")
+
+
+def append_rows(sheet, rows):
+    resp = sheet.append_rows(
+        rows,
+        value_input_option="USER_ENTERED",
+        insert_data_option="OVERWRITE",
+        table_range="A1",
+    )
+    # updatedRange contoh: 'Sheet1!A1234:X1235' -> baris pertama yang benar-benar terisi
+    updated = resp.get("updates", {}).get("updatedRange", "")
+    m = _RANGE_ROW.search(updated)
+    return int(m.group(1)) if m else None
+
+
+# --- BACA / TULIS PER RANGE (JOB MASSAL) ---
+# Beberapa range dibaca dalam satu request values.batchGet, sel yang berubah ditulis dalam satu
+# request values.batchUpdate, supaya kuota request per menit tidak habis untuk ribuan baris.
+def read_ranges(sheet, ranges):
+    return [list(rows) for rows in sheet.batch_get(ranges)]
+
+
+def write_cells(sheet, cells):
+    # cells: list (alamat A1, nilai)
+    if not cells:
+        return 0
+    sheet.batch_update([{"range": a1, "values": [[value]]} for a1, value in cells],
+                       value_input_option="USER_ENTERED")
+    return len(cells)
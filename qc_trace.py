@@ -0,0 +1,277 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# --- DURASI PER TAHAP SCAN (SPAN) ---
+# Setiap tahap (decode, rotate, encode, model, parse, refine, row_map, sheet_enqueue, sheet_save) dicatat
+# sebagai span dengan scan ID ke log JSONL, lalu diagregasi ke file metrik:
+# format Prometheus text (.prom, bisa dibaca node_exporter textfile collector) atau CSV (.csv).
+DEFAULT_SPAN_LOG = os.path.join(".qc_cache", "spans.jsonl")
+DEFAULT_METRICS = os.path.join(".qc_cache", "metrics.prom")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60) # Batas histogram (detik)
+
+_current_scan = contextvars.ContextVar("qc_scan_id", default=None)
+
+
+def new_scan_id():
+    return uuid.uuid4().hex[:12]
+
+
+def current_scan_id():
+    return _current_scan.get()
+
+
+def span(tracer, name, **attrs):
+    # Untuk modul yang tracer-nya opsional (benchmark, job offline): tanpa tracer tidak mencatat apa-apa
+    return tracer.span(name, **attrs) if tracer else nullcontext()
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=500) # Durasi terakhir, untuk p50/p95
+
+    def add(self, seconds, ok):
+        self.count += 1
+        self.total += seconds
+        if not ok:
+            self.errors += 1
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+        self.recent.append(seconds)
+
+    def percentiles(self):
+        vals = sorted(self.recent)
+        if not vals:
+            return None, None, None
+        return vals[len(vals) // 2], vals[min(len(vals) - 1, int(len(vals) * 0.95))], vals[-1]
+
+
+# --- PEAK RSS PER SCAN ---
+# Satu thread membaca RSS proses dari /proc/self/statm (Linux) tiap interval selama ada scan yang diukur;
+# tiap scan menyimpan RSS tertinggi yang terlihat. RSS adalah angka satu proses: kalau beberapa scan jalan
+# bersamaan, peak satu scan ikut memuat memori scan lain (batas atas, dipakai untuk sizing server).
+# Di OS tanpa /proc pengukuran dilewati.
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssSampler:
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            rss = current_rss() or 0
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                for box in self._active.values():
+                    box["peak"] = max(box["peak"], rss)
+            time.sleep(self.interval)
+
+    @contextmanager
+    def measure(self):
+        start = current_rss()
+        if start is None:
+            yield None
+            return
+        box = {"start": start, "peak": start}
+        with self._lock:
+            self._active[id(box)] = box
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        try:
+            yield box
+        finally:
+            end = current_rss() or 0
+            with self._lock:
+                del self._active[id(box)]
+            box["peak"] = max(box["peak"], end)
+            box["end"] = end
+
+
+_sampler = RssSampler()
+
+
+class _Memory:
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.recent = deque(maxlen=500) # (peak, kenaikan dari awal scan) dalam byte
+
+    def add(self, peak, delta):
+        self.count += 1
+        self.total += peak
+        self.recent.append((peak, delta))
+
+    def stats(self):
+        if not self.recent:
+            return None
+        peaks = sorted(p for p, _ in self.recent)
+        deltas = sorted(d for _, d in self.recent)
+        q = lambda vals, f: vals[min(len(vals) - 1, int(len(vals) * f))]
+        return {"count": self.count, "p50": q(peaks, 0.5), "p95": q(peaks, 0.95), "max": peaks[-1],
+                "delta_p50": q(deltas, 0.5), "delta_p95": q(deltas, 0.95), "delta_max": deltas[-1]}
+
+
+class Tracer:
+    def __init__(self, log_path=DEFAULT_SPAN_LOG, metrics_path=DEFAULT_METRICS, export_interval=10.0,
+                 max_log_bytes=50 * 1024 * 1024):
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.export_interval = export_interval
+        self.max_log_bytes = max_log_bytes
+        self._stages = {}
+        self._memory = _Memory()
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+        self._log = None
+        for path in (log_path, metrics_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @contextmanager
+    def scan(self, scan_id=None):
+        # Span di dalam blok ini otomatis memakai scan ID yang sama
+        scan_id = scan_id or new_scan_id()
+        token = _current_scan.set(scan_id)
+        try:
+            yield scan_id
+        finally:
+            _current_scan.reset(token)
+
+    @contextmanager
+    def span(self, name, scan_id=None, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.record(name, time.perf_counter() - start, scan_id, error=f"{type(e).__name__}: {e}", **attrs)
+            raise
+        self.record(name, time.perf_counter() - start, scan_id, **attrs)
+
+    @contextmanager
+    def memory(self, scan_id=None):
+        # Peak RSS selama blok ini; box['discard'] = True kalau ternyata bukan scan (tidak dicatat)
+        box = None
+        try:
+            with _sampler.measure() as box:
+                yield box if box is not None else {}
+        finally:
+            if box is not None and not box.get("discard"):
+                self.record_memory(box["start"], box["peak"], scan_id)
+
+    def record_memory(self, start, peak, scan_id=None):
+        mb = 1024 * 1024
+        entry = {"ts": time.time(), "scan_id": scan_id or current_scan_id(), "span": "memory",
+                 "peak_rss_mb": round(peak / mb, 1), "start_rss_mb": round(start / mb, 1),
+                 "delta_mb": round((peak - start) / mb, 1)}
+        with self._lock:
+            self._memory.add(peak, peak - start)
+            self._write_log(entry)
+
+    def memory_stats(self):
+        with self._lock:
+            return self._memory.stats()
+
+    def record(self, name, seconds, scan_id=None, error=None, **attrs):
+        entry = {"ts": time.time(), "scan_id": scan_id or current_scan_id(), "span": name,
+                 "ms": round(seconds * 1000, 2), "ok": error is None}
+        if error:
+            entry["error"] = error[:300]
+        entry.update(attrs)
+        with self._lock:
+            self._stages.setdefault(name, _Stage()).add(seconds, error is None)
+            self._write_log(entry)
+            due = time.time() - self._last_export >= self.export_interval
+        if due:
+            self.export()
+
+    def _write_log(self, entry):
+        if not self.log_path:
+            return
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        self._log.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        if self._log.tell() > self.max_log_bytes:
+            # Rotasi sederhana: simpan satu file lama (.1), mulai file baru
+            self._log.close()
+            os.replace(self.log_path, self.log_path + ".1")
+            self._log = None
+
+    def stats(self):
+        with self._lock:
+            stages = {name: (s.count, s.errors, s.total, s.percentiles()) for name, s in self._stages.items()}
+        return {
+            name: {"count": count, "errors": errors, "avg": total / count, "p50": p50, "p95": p95, "max": mx}
+            for name, (count, errors, total, (p50, p95, mx)) in stages.items()
+        }
+
+    def _prometheus(self):
+        lines = [
+            "# HELP qc_stage_seconds Durasi tahap scan QC",
+            "# TYPE qc_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for name, s in stages:
+                for le, n in zip(BUCKETS, s.buckets):
+                    lines.append(f'qc_stage_seconds_bucket{{stage="{name}",le="{le}"}} {n}')
+                lines.append(f'qc_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s.count}')
+                lines.append(f'qc_stage_seconds_sum{{stage="{name}"}} {s.total:.6f}')
+                lines.append(f'qc_stage_seconds_count{{stage="{name}"}} {s.count}')
+            lines += ["# HELP qc_stage_errors_total Jumlah tahap scan yang gagal",
+                      "# TYPE qc_stage_errors_total counter"]
+            lines += [f'qc_stage_errors_total{{stage="{name}"}} {s.errors}' for name, s in stages]
+            mem = self._memory.stats()
+            if mem:
+                lines += ["# HELP qc_scan_peak_rss_bytes Peak RSS proses selama scan",
+                          "# TYPE qc_scan_peak_rss_bytes summary",
+                          f'qc_scan_peak_rss_bytes{{quantile="0.5"}} {mem["p50"]}',
+                          f'qc_scan_peak_rss_bytes{{quantile="0.95"}} {mem["p95"]}',
+                          f"qc_scan_peak_rss_bytes_sum {self._memory.total}",
+                          f"qc_scan_peak_rss_bytes_count {mem['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def _csv(self):
+        lines = ["stage,count,errors,avg_ms,p50_ms,p95_ms,max_ms"]
+        for name, s in sorted(self.stats().items()):
+            lines.append(f"{name},{s['count']},{s['errors']},{s['avg']*1000:.1f},{s['p50']*1000:.1f},"
+                         f"{s['p95']*1000:.1f},{s['max']*1000:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        if not self.metrics_path:
+            return
+        text = self._csv() if self.metrics_path.endswith(".csv") else self._prometheus()
+        # Tulis ke file sementara lalu rename, supaya collector tidak membaca file setengah jadi
+        tmp = f"{self.metrics_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.metrics_path)
+        self._last_export = time.time()
@@ -0,0 +1,79 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+# --- SPOOL FILE UPLOAD KE DISK ---
+# File kecil tetap di memori. File di atas threshold (PDF/TIFF multi-halaman, foto HP resolusi penuh) disalin
+# per chunk ke file di .qc_cache/uploads, lalu decoder membaca dari file itu: Pillow dan pdfium hanya membaca
+# bagian yang dibutuhkan, dan tidak ada salinan bytes tambahan yang ikut tersimpan di cache/session Streamlit.
+# Hash dihitung sambil menyalin, jadi file tidak perlu dibaca dua kali.
+DEFAULT_SPOOL_DIR = os.path.join(".qc_cache", "uploads")
+SPOOL_THRESHOLD = 4 * 1024 * 1024 # Byte
+SPOOL_MAX_AGE = 6 * 3600 # File spool lebih tua dari ini dihapus (detik)
+CHUNK = 1024 * 1024
+
+
+class Upload:
+    def __init__(self, name, file_hash, size, data=None, path=None):
+        self.name = name
+        self.hash = file_hash
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def spooled(self):
+        return self.path is not None
+
+    def open(self):
+        # File-like baru tiap dipanggil (aman dipakai beberapa decoder / thread sekaligus)
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self.data)
+
+
+def _prune(spool_dir, max_age):
+    now = time.time()
+    for name in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def spool_upload(f, threshold=SPOOL_THRESHOLD, spool_dir=DEFAULT_SPOOL_DIR, max_age=SPOOL_MAX_AGE):
+    # f: UploadedFile Streamlit (atau file-like lain dengan .name)
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    name = getattr(f, "name", "upload")
+    if size <= threshold:
+        data = f.read()
+        return Upload(name, hashlib.sha1(data).hexdigest(), size, data=data)
+
+    os.makedirs(spool_dir, exist_ok=True)
+    _prune(spool_dir, max_age)
+    h = hashlib.sha1()
+    ext = os.path.splitext(name)[1].lower()
+    fd, tmp = tempfile.mkstemp(dir=spool_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = f.read(CHUNK)
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+        # Nama file = hash: upload ulang file yang sama memakai file spool yang sama
+        path = os.path.join(spool_dir, h.hexdigest() + ext)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    f.seek(0)
+    return Upload(name, h.hexdigest(), size, path=path)
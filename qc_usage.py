@@ -0,0 +1,102 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+# --- PEMAKAIAN TOKEN & BIAYA AI ---
+# Token input (teks + gambar), output dan cache dari usage_metadata dicatat per scan ke SQLite,
+# lalu bisa direkap per material / hari / operator untuk melihat material mana yang paling mahal.
+# Contoh laporan: python qc_usage.py --by material day --days 7
+DEFAULT_USAGE_PATH = os.path.join(".qc_cache", "usage.sqlite")
+
+# Harga USD per 1 juta token (input, output, input dari cache). Cek lagi halaman harga Gemini kalau berubah.
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+    "gemini-2.5-flash-lite": (0.10, 0.40, 0.025),
+}
+GROUP_COLUMNS = ("material", "day", "operator", "model")
+
+
+def cost_of(model, usage):
+    price = MODEL_PRICES.get(model)
+    if price is None or not usage:
+        return 0.0
+    p_in, p_out, p_cached = price
+    cached = usage.get("cached") or 0
+    fresh = max(0, (usage.get("prompt") or 0) - cached)
+    return (fresh * p_in + cached * p_cached + (usage.get("output") or 0) * p_out) / 1_000_000
+
+
+class UsageLedger:
+    def __init__(self, path=DEFAULT_USAGE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, day TEXT NOT NULL,"
+            " scan_id TEXT, material TEXT NOT NULL, operator TEXT, model TEXT,"
+            " prompt INTEGER NOT NULL, image INTEGER NOT NULL, output INTEGER NOT NULL,"
+            " cached INTEGER NOT NULL, total INTEGER NOT NULL, cost REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS usage_day ON usage(day)")
+        self._db.commit()
+
+    def record(self, material, model, usage, scan_id=None, operator=None, ts=None):
+        if not usage:
+            return None
+        ts = ts or time.time()
+        cost = cost_of(model, usage)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO usage (ts, day, scan_id, material, operator, model, prompt, image, output, cached,"
+                " total, cost) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ts, time.strftime("%Y-%m-%d", time.localtime(ts)), scan_id, material, operator or "", model,
+                 usage.get("prompt") or 0, usage.get("image") or 0, usage.get("output") or 0,
+                 usage.get("cached") or 0, usage.get("total") or 0, cost),
+            )
+            self._db.commit()
+        return cost
+
+    def report(self, by=("material",), days=None):
+        for col in by:
+            if col not in GROUP_COLUMNS:
+                raise ValueError(f"Kolom rekap tidak dikenal: {col}")
+        cols = ", ".join(by)
+        where, params = "", ()
+        if days:
+            where, params = "WHERE ts >= ?", (time.time() - days * 86400,)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {cols}, COUNT(*), SUM(prompt), SUM(image), SUM(output), SUM(cached), SUM(total), SUM(cost)"
+                f" FROM usage {where} GROUP BY {cols} ORDER BY SUM(cost) DESC",
+                params,
+            ).fetchall()
+        keys = tuple(by) + ("scans", "prompt", "image", "output", "cached", "total", "cost")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def print_report(rows, by):
+    header = "".join(f"{col:<14}" for col in by)
+    print(f"{header}{'scan':>6} {'input':>10} {'gambar':>9} {'output':>9} {'cache':>9} "
+          f"{'tok/scan':>9} {'USD':>9} {'USD/scan':>9}")
+    for r in rows:
+        group = "".join(f"{str(r[col] or '-'):<14}" for col in by)
+        print(f"{group}{r['scans']:>6} {r['prompt']:>10} {r['image']:>9} {r['output']:>9} {r['cached']:>9} "
+              f"{r['total'] / r['scans']:>9.0f} {r['cost']:>9.4f} {r['cost'] / r['scans']:>9.5f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rekap pemakaian token & biaya AI per material / hari / operator")
+    ap.add_argument("--db", default=DEFAULT_USAGE_PATH)
+    ap.add_argument("--by", nargs="+", choices=GROUP_COLUMNS, default=["material"])
+    ap.add_argument("--days", type=float, help="Hanya N hari terakhir")
+    args = ap.parse_args()
+    print_report(UsageLedger(args.db).report(args.by, args.days), args.by)
+
+
+if __name__ == "__main__":
+    main()
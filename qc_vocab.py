@@ -0,0 +1,170 @@
+import re
+from functools import lru_cache
+
+from qc_config import MAT_CONFIG
+from qc_schema import film_names
+
+# --- SNAP NILAI KE VOCABULARY (FUZZY, TERINDEKS) ---
+# Nama film, supplier, ketebalan dan segmen ID/IDS nomor batch dicocokkan ke daftar nilai valid di MAT_CONFIG.
+# Jarak = Levenshtein dengan biaya substitusi 0.5 untuk karakter yang sering tertukar saat dibaca
+# (0/O, 1/I/L/T, 5/S, 8/B, ...). Index dibangun sekali per material, hasil lookup di-cache.
+CONFUSABLE = ["0OQD", "1ILT", "5S", "8B", "2Z", "6G", "UV"]
+MAX_RATIO = 0.34 # Jarak maksimum relatif terhadap panjang nilai valid (minimal 1 karakter)
+# max_ratio=0: tanpa batas minimum, hanya substitusi karakter yang sering tertukar (panjang sama)
+# fixed_digits=True: angka harus sama persis (huruf yang mirip angka dihitung sebagai angkanya), jadi
+# 'PET IF-8' tidak di-snap ke 'PET IF-9' dan 'LLDPE C8 WHITE' tidak ke 'LLDPE C4 WHITE'
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+_SPACES = re.compile(r"\s+")
+
+_CONFUSE = {(a, b) for group in CONFUSABLE for a in group for b in group if a != b}
+_AS_DIGIT = str.maketrans({c: group[0] for group in CONFUSABLE if group[0].isdigit() for c in group[1:]})
+
+
+def _norm(value):
+    return _NON_ALNUM.sub("", str(value).upper())
+
+
+def _digits(key):
+    return "".join(c for c in key.translate(_AS_DIGIT) if c.isdigit())
+
+
+def distance(a, b, limit=None):
+    # Levenshtein berbobot; berhenti lebih awal kalau seluruh baris sudah melewati limit
+    prev = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        cur = [float(i)]
+        for j, cb in enumerate(b, 1):
+            sub = 0.0 if ca == cb else 0.5 if (ca, cb) in _CONFUSE else 1.0
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + sub))
+        if limit is not None and min(cur) > limit:
+            return min(cur)
+        prev = cur
+    return prev[-1]
+
+
+class VocabIndex:
+    def __init__(self, values, max_ratio=MAX_RATIO, cache_size=4096, fixed_digits=False):
+        self.values = list(values)
+        self.max_ratio = max_ratio
+        self.fixed_digits = fixed_digits
+        self._exact = {}
+        self._by_norm = {}
+        self._by_len = {}
+        for v in self.values:
+            self._exact.setdefault(_SPACES.sub(" ", v.upper().strip()), v)
+            key = _norm(v)
+            # Dua nilai valid bisa sama setelah normalisasi (HHK08 / HHK-08): simpan yang pertama
+            if key not in self._by_norm:
+                self._by_norm[key] = v
+                self._by_len.setdefault(len(key), []).append(key)
+        self.snap = lru_cache(maxsize=cache_size)(self._snap)
+
+    def _limit(self, key):
+        return max(1.0, len(key) * self.max_ratio)
+
+    def _snap(self, value):
+        # Return (nilai valid terdekat, jarak). Kalau tidak ada yang cukup dekat atau ada dua kandidat
+        # sama dekat, nilai asli dikembalikan dengan jarak kandidat terbaik (None kalau tidak ada kandidat).
+        if value is None:
+            return value, None
+        text = _SPACES.sub(" ", str(value).upper().strip())
+        if not text:
+            return value, None
+        if text in self._exact:
+            return self._exact[text], 0.0
+        key = _norm(text)
+        if key in self._by_norm:
+            return self._by_norm[key], 0.0
+        if not self.max_ratio:
+            return self._snap_confusable(value, key)
+
+        best, best_d, tie = None, None, False
+        digits = _digits(key) if self.fixed_digits else None
+        max_limit = max(1.0, (len(key) + 3) * self.max_ratio)
+        for length, keys in self._by_len.items():
+            if abs(length - len(key)) > max_limit:
+                continue
+            for cand in keys:
+                limit = self._limit(cand)
+                if abs(len(cand) - len(key)) > limit:
+                    continue
+                if digits is not None and _digits(cand) != digits:
+                    continue
+                d = distance(key, cand, limit=best_d if best_d is not None else limit)
+                if best_d is None or d < best_d:
+                    best, best_d, tie = cand, d, False
+                elif d == best_d and self._by_norm[cand] != self._by_norm[best]:
+                    tie = True
+        if best is None or tie or best_d > self._limit(best):
+            return value, best_d
+        return self._by_norm[best], best_d
+
+    def _snap_confusable(self, value, key):
+        # Ketebalan: 8 -> 9 atau 17 -> 18 adalah nilai lain, bukan salah baca; yang dikoreksi hanya B -> 8, O -> 0, dst.
+        best, best_d, tie = None, None, False
+        for cand in self._by_len.get(len(key), ()):
+            diff = [(a, b) for a, b in zip(key, cand) if a != b]
+            if not all(pair in _CONFUSE for pair in diff):
+                continue
+            d = 0.5 * len(diff)
+            if best_d is None or d < best_d:
+                best, best_d, tie = cand, d, False
+            elif d == best_d:
+                tie = True
+        if best is None or tie:
+            return value, best_d
+        return self._by_norm[best], best_d
+
+
+@lru_cache(maxsize=None)
+def material_index(material_type):
+    vocab = MAT_CONFIG[material_type]["vocab"]
+    index = {
+        # Angka di nama film = grade/ketebalan (C4/C8, IF-9/IF-12): harus tetap cocok dengan field thickness
+        "nama_film": VocabIndex(film_names(vocab), fixed_digits=True),
+        "supplier": VocabIndex(vocab["suppliers"]),
+        "batch_id": VocabIndex(vocab["batch_id"]),
+        "batch_ids": VocabIndex(vocab["batch_ids"]),
+    }
+    if vocab.get("thickness"):
+        index["thickness"] = VocabIndex(vocab["thickness"], max_ratio=0)
+    return index
+
+
+def snap_batch(material_type, no_batch):
+    # Segmen ke-2 (ID) dan ke-4 (IDS) dari nomor batch yang sudah dirapikan refine_batch_number
+    parts = str(no_batch or "").split("/")
+    if len(parts) < 4:
+        return no_batch, None
+    index = material_index(material_type)
+    parts[1], d1 = index["batch_id"].snap(parts[1])
+    parts[3], d3 = index["batch_ids"].snap(parts[3])
+    if d1 is None or d3 is None:
+        return "/".join(parts), None
+    return "/".join(parts), d1 + d3
+
+
+def snap_field(material_type, key, value):
+    if key == "no_batch":
+        return snap_batch(material_type, value)
+    index = material_index(material_type).get(key)
+    if index is None:
+        return value, None
+    return index.snap(value)
+
+
+SNAP_FIELDS = ("nama_film", "supplier", "thickness", "no_batch")
+
+
+def snap_result(data, material_type):
+    # Ganti nilai yang dekat ke vocabulary; koreksi dicatat di data['_snapped'] = {field: [nilai asli, jarak]}
+    snapped = {}
+    for key in SNAP_FIELDS:
+        if key not in data:
+            continue
+        value, dist = snap_field(material_type, key, data[key])
+        if value != data[key]:
+            snapped[key] = [data[key], dist]
+            data[key] = value
+    data["_snapped"] = snapped
+    return data